@@ -1,84 +1,377 @@
 import streamlit as st
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.applications.efficientnet import preprocess_input
-from PIL import Image
-from fpdf import FPDF
 import base64
 import time
 from datetime import datetime
 import pytz
-from pymongo import MongoClient
-from io import BytesIO
+from io import StringIO
 import re
-import os
+import uuid
+from prediction_cache import PredictionCache
+from inference_engine import InferenceEngine
+from inference_client import InferenceClient
+from batch_scan import ResultWriter, iter_uploaded_files, score_images
+from user_store import UserStore
+import scan_history
+import analytics
+import metrics
+from metrics import timed
+from blob_store import make_thumbnail, open_blob_store
+from session_images import SessionImageStore
+from data_access import DataAccess, create_client
+from reports import ReportQueueFull, ReportService
+from startup import StartupTimer
+from model_registry import ModelRegistry
+from inference import MODEL_PATH, TFLITE_MODEL_PATH, load_model_backend, decode_prediction
+from preprocessing import preprocess_image
 # -------------------- MongoDB Setup --------------------
 MONGO_URL = st.secrets.get("MONGO_URL")  
 if not MONGO_URL:
     st.error("MongoDB URL not found. Please set MONGO_URL in .env or Streamlit secrets.")
     st.stop()
-client = MongoClient(MONGO_URL)
-db = client["AlzheimersDiseaseDetection"]    
-users_collection = db["users"]   
-applications_collection = db["applications"]  
+
+@st.cache_resource
+def get_data_access():
+    client = create_client(
+        MONGO_URL,
+        maxPoolSize=int(st.secrets.get("MONGO_MAX_POOL_SIZE", 50)),
+        serverSelectionTimeoutMS=int(st.secrets.get("MONGO_TIMEOUT_MS", 5000)),
+        compressors=st.secrets.get("MONGO_COMPRESSORS", "zlib"),
+        readPreference=st.secrets.get("MONGO_READ_PREFERENCE", "primaryPreferred"),
+    )
+    data_access = DataAccess(
+        client,
+        write_batch_size=int(st.secrets.get("MONGO_WRITE_BATCH_SIZE", 100)),
+        write_flush_interval=float(st.secrets.get("MONGO_WRITE_FLUSH_MS", 50)) / 1000,
+    )
+    data_access.ensure_indexes()
+    return data_access
+
+def get_db():
+    return get_data_access().db
+
+def get_users_collection():
+    return get_data_access().users
+
+@st.cache_resource
+def get_user_store():
+    return UserStore(get_users_collection(), cache_ttl=float(st.secrets.get("USER_CACHE_TTL", 10)))
+
+@st.cache_resource
+def get_blob_store():
+    return open_blob_store(get_db(), st.secrets.get("BLOB_STORE_DIR"))
+
+def get_applications_collection():
+    return get_data_access().applications
 #----
 page_title="Alzheimers Disease Detection"
 page_icon="🧠"
 st.set_page_config(page_title=page_title,page_icon=page_icon)
-MODEL_PATH = "20_04_2025_ADNI_best_model.keras"
-IMG_SIZE = (224, 224)
-class_labels = ['Final AD JPEG', 'Final CN JPEG', 'Final EMCI JPEG', 'Final LMCI JPEG', 'Final MCI JPEG']
+PREVIEW_SIZE = (320, 320)
+MODEL_BACKEND = st.secrets.get("MODEL_BACKEND", "keras")
+SERVED_MODEL_PATH = st.secrets.get("TFLITE_MODEL_PATH", TFLITE_MODEL_PATH) if MODEL_BACKEND == "tflite" else MODEL_PATH
 
 @st.cache_resource
-def load_prediction_model():
-    return load_model(MODEL_PATH)
+def get_startup_timer():
+    return StartupTimer()
 
-model = load_prediction_model()
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(
+        max_entries=int(st.secrets.get("PREDICTION_CACHE_SIZE", 256)),
+        disk_dir=st.secrets.get("PREDICTION_CACHE_DIR"),
+        max_disk_entries=int(st.secrets.get("PREDICTION_CACHE_DISK_ENTRIES", 10000)),
+    )
 
-# -------------------- Image Processing --------------------
-def preprocess_image(image):
-    image = image.convert('RGB')
-    image = image.resize(IMG_SIZE)
-    img_array = np.array(image, dtype=np.float32)
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array = preprocess_input(img_array)
-    return img_array
+@st.cache_resource
+def get_model_registry():
+    # Loads and warms the live model on a background thread so pages that never
+    # run inference do not wait for TensorFlow. MODEL_REGISTRY_PATH names a JSON
+    # file ({"live": spec, "shadow": spec, "shadow_fraction": 0.1}) that is
+    # re-read on change, so new versions roll out without a restart.
+    engine_options = {
+        "max_batch_size": int(st.secrets.get("INFERENCE_MAX_BATCH_SIZE", 16)),
+        "max_wait_ms": float(st.secrets.get("INFERENCE_MAX_WAIT_MS", 5)),
+    }
+    return ModelRegistry(
+        lambda spec: load_model_backend(spec.get("backend", "keras"), spec["path"], max_batch_size=engine_options["max_batch_size"]),
+        lambda model: InferenceEngine.from_model(model, **engine_options),
+        default_spec={"backend": MODEL_BACKEND, "path": SERVED_MODEL_PATH},
+        registry_path=st.secrets.get("MODEL_REGISTRY_PATH"),
+        timer=get_startup_timer(),
+    )
+
+def get_inference_engine():
+    return get_model_registry().live().engine()
+
+INFERENCE_SERVICE_URL = st.secrets.get("INFERENCE_SERVICE_URL")
+
+@st.cache_resource
+def get_inference_client():
+    return InferenceClient(
+        INFERENCE_SERVICE_URL,
+        pool_size=int(st.secrets.get("INFERENCE_CLIENT_POOL_SIZE", 16)),
+        timeout=float(st.secrets.get("INFERENCE_CLIENT_TIMEOUT", 35)),
+    )
+
+@st.cache_data(ttl=30)
+def get_remote_model_id():
+    return get_inference_client().model_id()
+
+def get_live_model():
+    # (model_id, model_version) of the model currently answering predictions.
+    if INFERENCE_SERVICE_URL:
+        model_id = get_remote_model_id()
+        return model_id, model_id[:12]
+    live = get_model_registry().live()
+    return live.model_id, live.version
 
+# -------------------- Image Processing --------------------
 def predict(image):
-    img_array = preprocess_image(image)
-    predictions = model.predict(img_array)[0]
-    predicted_class = np.argmax(predictions)
-    confidence = predictions[predicted_class] * 100
-    return class_labels[predicted_class], confidence, predictions
-
-def encode_image(image):
-    buffer = BytesIO()
-    image.save(buffer, format="JPEG")
-    encoded = base64.b64encode(buffer.getvalue()).decode()
-    return encoded
-
-def decode_image(encoded_image):
-    decoded = base64.b64decode(encoded_image)
-    buffer = BytesIO(decoded)
-    image = Image.open(buffer)
-    return image
+    # Also returns the (model_id, model_version) that actually answered, which
+    # may differ from the one looked up before a hot swap.
+    if INFERENCE_SERVICE_URL:
+        with timed("remote_predict"):
+            predicted_label, confidence, predictions, model_id = get_inference_client().predict(image)
+        return predicted_label, confidence, predictions, model_id, model_id[:12]
+    with timed("preprocess_image"):
+        img_array = preprocess_image(image)
+    with timed("model_predict"):
+        batch_predictions, deployment = get_model_registry().predict(img_array)
+    predictions = batch_predictions[0]
+    predicted_label, confidence = decode_prediction(predictions)
+    return predicted_label, confidence, predictions, deployment.model_id, deployment.version
+
+def cached_predict(image_bytes):
+    cache = get_prediction_cache()
+    model_id, model_version = get_live_model()
+    cached = cache.get(cache.make_key(image_bytes, model_id))
+    if cached is not None:
+        return cached["label"], cached["confidence"], np.array(cached["predictions"], dtype=np.float32), model_version
+    # Pass the raw bytes so preprocessing can use JPEG draft decoding.
+    predicted_label, confidence, predictions, model_id, model_version = predict(image_bytes)
+    get_startup_timer().mark("first_prediction")
+    cache.put(cache.make_key(image_bytes, model_id), {
+        "label": predicted_label,
+        "confidence": float(confidence),
+        "predictions": [float(p) for p in predictions],
+    })
+    return predicted_label, confidence, predictions, model_version
+
+@st.cache_resource
+def get_session_image_store():
+    return SessionImageStore(
+        max_bytes=int(st.secrets.get("SESSION_IMAGE_CACHE_MB", 64)) * 1024 * 1024,
+        idle_timeout=float(st.secrets.get("SESSION_IDLE_TIMEOUT", 1800)),
+    )
+
+def get_session_id():
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
+
+def remember_uploaded_image(image_bytes):
+    # The session keeps only the content hash and a small preview; the
+    # original bytes live once in the shared, size-bounded store.
+    key = get_session_image_store().put(get_session_id(), image_bytes)
+    if st.session_state.get("uploaded_image_key") != key:
+        with timed("image_preview"):
+            st.session_state["uploaded_image_preview"] = make_thumbnail(image_bytes, PREVIEW_SIZE)
+        st.session_state["uploaded_image_key"] = key
+        clear_report_job()
+
+def get_uploaded_image_bytes():
+    key = st.session_state.get("uploaded_image_key")
+    return get_session_image_store().get(key) if key else None
+
+@timed("store_uploaded_image")
+def store_uploaded_image(image_bytes):
+    return get_blob_store().put(image_bytes)
 
 # -------------------- MongoDB Functions --------------------
+@timed("save_user")
 def save_user(email, name, password):
-    user = {"email": email, "name": name, "password": password}
-    users_collection.insert_one(user)
+    return get_user_store().create_user(email, name, password)
 
-def load_users():
-    users = users_collection.find()
-    return {user["email"]: {"name": user["name"], "password": user["password"]} for user in users}
+@timed("find_user")
+def find_user(email):
+    return get_user_store().find_user(email)
 
+@timed("save_application_form")
 def save_application_form(data):
-    applications_collection.insert_one(data)
+    # Queued for a batched insert_many; the returned Future resolves to the
+    # _id once MongoDB acknowledges the write.
+    return get_data_access().save_application(data)
+
+@timed("get_previous_applications_page")
+def get_previous_applications_page(email, page_size, after=None):
+    return scan_history.list_applications_page(get_applications_collection(), email, page_size, after)
+
+@timed("load_application_image")
+def load_application_image(application_id, email):
+    from bson import ObjectId
+    application = scan_history.fetch_application_image(get_applications_collection(), ObjectId(application_id), email)
+    if application.get("image_ref"):
+        return get_blob_store().get(application["image_ref"])
+    encoded = application.get("image_base64")
+    return base64.b64decode(encoded) if encoded else None
+
+@st.cache_data(ttl=60, max_entries=1024, show_spinner=False)
+def get_scan_summary(email):
+    collection = get_applications_collection()
+    return analytics.user_prediction_summary(collection, email), analytics.user_confidence_histogram(collection, email)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_application_image(application_id, email):
+    return load_application_image(application_id, email)
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def get_image_thumbnail(image_ref):
+    return get_blob_store().get_thumbnail(image_ref)
+
+# -------------------- Reports --------------------
+@st.cache_resource
+def get_report_service():
+    return ReportService(
+        max_workers=int(st.secrets.get("REPORT_WORKERS", 2)),
+        max_pending=int(st.secrets.get("REPORT_MAX_PENDING", 32)),
+        max_bulk_jobs=int(st.secrets.get("REPORT_MAX_BULK_JOBS", 4)),
+        bulk_dir=st.secrets.get("REPORT_BULK_DIR"),
+    )
+
+def report_filename(name, submitted_at):
+    sanitized_name = re.sub(r'[^a-zA-Z0-9]', '_', str(name).strip())
+    timestamp = re.sub(r'[^0-9]', '', str(submitted_at))
+    return f"Alzheimer_MRI_Report_{sanitized_name}_{timestamp}.pdf"
+
+def format_submitted_at(submitted_at):
+    if not submitted_at:
+        return "N/A"
+    return scan_history.as_datetime(submitted_at).astimezone(scan_history.LOCAL_TIMEZONE).strftime("%d-%m-%Y %H:%M:%S")
+
+def iter_history_reports(collection, blob_store, email):
+    # Consumed on a report worker thread, so it takes the collection and blob
+    # store directly instead of going through the Streamlit-cached getters.
+    applications = collection.find({"user_email": email}, scan_history.LIST_PROJECTION).sort(scan_history.HISTORY_SORT)
+    for application in applications:
+        if application.get("image_ref"):
+            image = blob_store.get(application["image_ref"])
+        else:
+            encoded = scan_history.fetch_application_image(collection, application["_id"], email).get("image_base64")
+            image = base64.b64decode(encoded) if encoded else None
+        report = {
+            "name": application.get("name", "N/A"),
+            "age": application.get("age", "N/A"),
+            "place": application.get("place", "N/A"),
+            "phone_number": application.get("phone_number", "N/A"),
+            "prediction": application.get("prediction", "N/A"),
+            "confidence": application.get("confidence", 0.0),
+            "submitted_at": format_submitted_at(application.get("submitted_at")),
+            "image": image,
+        }
+        yield f"{application['_id']}_{report_filename(report['name'], report['submitted_at'])}", report
 
-def get_previous_applications(email):
-    applications = applications_collection.find({"user_email": email}).sort("submitted_at", -1)
-    return list(applications)
+def clear_report_job():
+    for key in ("application_write", "report_job", "report_filename"):
+        st.session_state.pop(key, None)
+
+def report_pending():
+    write = st.session_state.get("application_write")
+    if write is not None and not write.done():
+        return True
+    job_key = st.session_state.get("report_job")
+    future = get_report_service().get(job_key) if job_key else None
+    return future is not None and not future.done()
+
+def show_report_status():
+    write = st.session_state.get("application_write")
+    if write is not None:
+        if not write.done():
+            st.info("⏳ Saving application...")
+        elif write.exception() is not None:
+            st.error(f"Error saving application: {write.exception()}")
+        else:
+            st.success("✅ Application saved.")
+    job_key = st.session_state.get("report_job")
+    if not job_key:
+        return None
+    future = get_report_service().get(job_key)
+    if future is None:
+        st.warning("Report is no longer available. Please generate it again.")
+    elif not future.done():
+        st.info("⏳ Generating report...")
+    elif future.exception() is not None:
+        st.error(f"Error generating report: {future.exception()}")
+    return future
+
+@st.fragment(run_every=1.0)
+def report_status():
+    # Polls only while the save or the PDF is in flight; once both are done a
+    # full rerun hands over to report_download(), which no longer renders
+    # this fragment, so the polling stops.
+    show_report_status()
+    if not report_pending():
+        st.rerun()
+
+def report_download():
+    if report_pending():
+        report_status()
+        return
+    future = show_report_status()
+    if future is not None and future.exception() is None:
+        st.download_button(
+            label="📥 Download Report",
+            data=future.result(),
+            file_name=st.session_state.get("report_filename", "Alzheimer_MRI_Report.pdf"),
+            mime="application/pdf",
+            on_click=clear_report_job
+        )
+    else:
+        # Nothing left to offer; show the outcome once rather than on every rerun.
+        clear_report_job()
+
+@st.fragment(run_every=1.0)
+def bulk_report_status():
+    # Polls the archive job; once it is done a full rerun shows the download
+    # button outside this fragment, so the zip is not re-read every second.
+    owner = st.session_state.get("bulk_report_job")
+    if not owner or st.session_state.get("bulk_report_ready"):
+        return
+    future = get_report_service().get_bulk(owner)
+    if future is None:
+        st.warning("Report archive is no longer available. Please generate it again.")
+        del st.session_state["bulk_report_job"]
+    elif not future.done():
+        st.info("⏳ Generating reports...")
+    else:
+        st.session_state["bulk_report_ready"] = True
+        st.rerun()
+
+def bulk_report_download():
+    owner = st.session_state.get("bulk_report_job")
+    if not owner or not st.session_state.get("bulk_report_ready"):
+        return
+    future = get_report_service().get_bulk(owner)
+    if future is None:
+        st.warning("Report archive is no longer available. Please generate it again.")
+        st.session_state.pop("bulk_report_job", None)
+        st.session_state.pop("bulk_report_ready", None)
+    elif future.exception() is not None:
+        st.error(f"Error generating reports: {future.exception()}")
+    else:
+        path, count = future.result()
+        try:
+            with open(path, "rb") as archive_file:
+                st.download_button(
+                    label=f"📥 Download Reports (ZIP, {count} reports)",
+                    data=archive_file,
+                    file_name="Alzheimer_MRI_Reports.zip",
+                    mime="application/zip"
+                )
+        except FileNotFoundError:
+            st.warning("Report archive is no longer available. Please generate it again.")
+            st.session_state.pop("bulk_report_job", None)
+            st.session_state.pop("bulk_report_ready", None)
 
 # -------------------- Styling --------------------
 def add_responsive_styles():
@@ -89,6 +382,69 @@ def add_responsive_styles():
     except FileNotFoundError:
         st.error("Error: styles.css not found. Please ensure it is in the same directory as the Python script.")
 
+# -------------------- Metrics --------------------
+def secret_flag(name, default=False):
+    # Secrets set through the environment arrive as strings, so "false",
+    # "0", "no" and "off" have to be read as off.
+    value = st.secrets.get(name, default)
+    if isinstance(value, str):
+        return value.strip().lower() not in ("", "0", "false", "no", "off")
+    return bool(value)
+
+@st.cache_resource
+def setup_metrics():
+    metrics.configure(
+        enabled=secret_flag("METRICS_ENABLED"),
+        tracing=bool(st.secrets.get("TRACE_FILE")),
+    )
+    if metrics.is_enabled() and st.secrets.get("METRICS_TEXTFILE"):
+        metrics.start_textfile_writer(st.secrets.get("METRICS_TEXTFILE"), float(st.secrets.get("METRICS_TEXTFILE_INTERVAL", 15)))
+    port = st.secrets.get("METRICS_PORT")
+    if metrics.is_enabled() and port:
+        return metrics.start_http_server(int(port), st.secrets.get("METRICS_HOST", "127.0.0.1"))
+    return None
+
+def track_session_memory():
+    store = get_session_image_store()
+    store.touch(get_session_id())
+    store.evict_idle()
+    stats = store.stats()
+    metrics.registry.set_gauge("app_session_image_bytes", stats["bytes"])
+    metrics.registry.set_gauge("app_session_image_sessions", stats["sessions"])
+    for name, value in (("app_process_rss_bytes", metrics.current_rss_bytes()), ("app_process_peak_rss_bytes", metrics.max_rss_bytes())):
+        if value is not None:
+            metrics.registry.set_gauge(name, value)
+
+# -------------------- Operator Panel --------------------
+def operator_panel():
+    if not secret_flag("OPERATOR_MODE"):
+        return
+    with st.sidebar.expander("⚙️ Operator Stats"):
+        st.markdown("**Prediction cache**")
+        st.json(get_prediction_cache().stats())
+        st.markdown("**Session images**")
+        st.json(get_session_image_store().stats())
+        st.markdown("**Application writes**")
+        st.json(get_data_access().application_writes.stats())
+        st.markdown("**Reports**")
+        st.json(get_report_service().stats())
+        if metrics.is_enabled():
+            st.markdown("**Stage latency**")
+            st.json(metrics.registry.summary())
+        st.markdown("**Startup timing**")
+        st.json(get_startup_timer().report())
+        st.markdown("**Inference engine**")
+        if INFERENCE_SERVICE_URL:
+            st.write(f"Served remotely by {INFERENCE_SERVICE_URL}")
+            return
+        registry = get_model_registry()
+        if registry.is_ready():
+            st.json(get_inference_engine().stats())
+        else:
+            st.write("Model is still warming up.")
+        st.markdown("**Model registry**")
+        st.json(registry.stats())
+
 # -------------------- Pages --------------------
 def home_page():
     with st.container():
@@ -117,12 +473,12 @@ def login_page():
         st.subheader("🔐 Login")
         email = st.text_input("Email", key="login_email")
         password = st.text_input("Password", type="password")
-        users = load_users()
         if st.button("Login"):
-            if email in users and users[email]["password"] == password:
+            user = find_user(email) if email else None
+            if user and user["password"] == password:
                 st.toast("✅ Login Successful! Redirecting..", icon="✅")
                 time.sleep(0.5)
-                st.session_state["Name"] = users[email]["name"]
+                st.session_state["Name"] = user["name"]
                 st.session_state["Email"] = email
                 st.session_state["page"] = "guidelines"
                 st.rerun()
@@ -144,7 +500,6 @@ def signup_page():
         email = st.text_input("Email", key="signup_email")
         password = st.text_input("Password", type="password", key="signup_password")
         confirm_password = st.text_input("Re-enter Password", type="password", key="signup_confirm_password")
-        users = load_users()
         if st.button("Signup"):
             if not name or not name.strip():
                 st.error("Name cannot be empty.")
@@ -154,10 +509,9 @@ def signup_page():
                 st.error("Passwords do not match!")
             elif not email:
                 st.error("Email is required.")
-            elif email in users:
+            elif not save_user(email, name, password):
                 st.error("User already exists!")
             else:
-                save_user(email, name, password)
                 st.toast("✅ Signup Successful! Redirecting to Home...", icon="✅")
                 time.sleep(0.5)
                 st.session_state["page"] = "Home"
@@ -185,7 +539,7 @@ def guidelines_page():
                 <li><span class="label">Final AD JPEG:</span> <span class="description">Alzheimer’s Disease – Advanced cognitive decline, significant memory and behavioral changes.</span></li>
             </ul>
         """, unsafe_allow_html=True)
-        col1, col2 = st.columns([1,1])
+        col1, col2, col3 = st.columns([1,1,1])
         with col1:
             if st.button("Proceed to Scan"):
                 st.session_state["page"] = "scan"
@@ -198,6 +552,12 @@ def guidelines_page():
                 st.toast("✅ Redirecting to Previous Scan Page...", icon="✅")
                 time.sleep(0.5)
                 st.rerun()
+        with col3:
+            if st.button("Batch Scan"):
+                st.session_state["page"] = "batch_scan"
+                st.toast("✅ Redirecting to Batch Scan Page...", icon="✅")
+                time.sleep(0.5)
+                st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="footer">© 2025 alzheimers-disease-detection</div>', unsafe_allow_html=True)
 
@@ -207,14 +567,16 @@ def scan_page():
         st.title(f"📊 Alzheimer’s MRI Scan")
         uploaded_file = st.file_uploader("Upload Brain MRI Image", type=['jpg', 'jpeg', 'png'])
         if uploaded_file is not None:
-            image = Image.open(uploaded_file)
-            st.image(image, caption='Uploaded Image', use_container_width =True)
-            predicted_label, confidence, predictions = predict(image)
+            image_bytes = uploaded_file.getvalue()
+            st.image(image_bytes, caption='Uploaded Image', use_container_width =True)
+            with st.spinner("Analyzing scan..."):
+                predicted_label, confidence, predictions, model_version = cached_predict(image_bytes)
             st.markdown(f"### 🟢 Prediction: {predicted_label}")
             st.markdown(f"### 📊 Confidence: {confidence:.2f}%")
-            st.session_state["uploaded_image"] = image
+            remember_uploaded_image(image_bytes)
             st.session_state["prediction_label"] = predicted_label
             st.session_state["prediction_confidence"] = confidence
+            st.session_state["prediction_model_version"] = model_version
         col1, col2, col3 = st.columns([1,1,1])
         with col1:
             if st.button("⬅ Back"):
@@ -237,6 +599,48 @@ def scan_page():
         st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="footer">© 2025 alzheimers-disease-detection</div>', unsafe_allow_html=True)
 
+def batch_scan_page():
+    with st.container():
+        st.markdown('<div class="main-content">', unsafe_allow_html=True)
+        st.title("🗂️ Batch MRI Scan")
+        uploaded_files = st.file_uploader("Upload Brain MRI Images", type=['jpg', 'jpeg', 'png'], accept_multiple_files=True)
+        if uploaded_files and st.button("▶ Score All"):
+            output = StringIO()
+            writer = ResultWriter(output, "csv")
+            results = []
+            progress = st.progress(0.0)
+            sources = iter_uploaded_files(uploaded_files)
+            if INFERENCE_SERVICE_URL:
+                scored = get_inference_client().score_files(sources)
+            else:
+                # Each batch goes through the registry, so a hot swap mid-job
+                # moves the remaining batches to the new live engine.
+                registry = get_model_registry()
+                scored = score_images(sources, lambda batch: registry.predict(batch)[0])
+            for idx, result in enumerate(scored, 1):
+                writer.write(result)
+                results.append({"file": result["file"], "prediction": result.get("prediction", "error"), "confidence": result.get("confidence", 0.0)})
+                progress.progress(idx / len(uploaded_files))
+            st.session_state["batch_results"] = results
+            st.session_state["batch_results_csv"] = output.getvalue()
+        if "batch_results" in st.session_state:
+            st.dataframe(st.session_state["batch_results"], use_container_width=True)
+            st.download_button(
+                label="📥 Download Results (CSV)",
+                data=st.session_state["batch_results_csv"],
+                file_name="batch_scan_results.csv",
+                mime="text/csv"
+            )
+        if st.button("⬅ Back"):
+            st.session_state.pop("batch_results", None)
+            st.session_state.pop("batch_results_csv", None)
+            st.session_state["page"] = "guidelines"
+            st.toast("✅ Back to Guidelines Page...", icon="✅")
+            time.sleep(0.5)
+            st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="footer">© 2025 alzheimers-disease-detection</div>', unsafe_allow_html=True)
+
 def previous_scan_page():
     st.title("📜 Previous Scan Details")
     with st.container():
@@ -250,15 +654,35 @@ def previous_scan_page():
             st.markdown('</div>', unsafe_allow_html=True)
             st.markdown('<div class="footer">© 2025 alzheimers-disease-detection</div>', unsafe_allow_html=True)
             return
-        applications = get_previous_applications(email)
+        summary, histogram = get_scan_summary(email)
+        if summary:
+            st.subheader("📊 Scan Summary")
+            st.bar_chart({row["prediction"]: row["count"] for row in summary})
+            st.dataframe([
+                {
+                    "Prediction": row["prediction"],
+                    "Scans": row["count"],
+                    "Avg Confidence (%)": round(row["avg_confidence"] or 0.0, 2),
+                    "Min (%)": round(row["min_confidence"] or 0.0, 2),
+                    "Max (%)": round(row["max_confidence"] or 0.0, 2),
+                    "Std Dev": round(row["std_confidence"] or 0.0, 2),
+                }
+                for row in summary
+            ], use_container_width=True)
+            if histogram:
+                st.caption("Confidence distribution")
+                st.bar_chart({row["range"]: row["count"] for row in histogram})
+            st.markdown("---")
+        page_size = int(st.secrets.get("HISTORY_PAGE_SIZE", 10))
+        cursors = st.session_state.setdefault("history_cursors", [None])
+        page_number = len(cursors) - 1
+        applications, next_cursor = get_previous_applications_page(email, page_size, cursors[-1])
         if applications:
-            for idx, application in enumerate(applications, 1):
+            for idx, application in enumerate(applications, page_number * page_size + 1):
                 submitted_at = application.get("submitted_at")
                 if submitted_at:
                     try:
-                        user_timezone = pytz.timezone("Asia/Kolkata")
-                        submitted_at = datetime.strptime(submitted_at, "%d-%m-%Y %H:%M:%S")
-                        submitted_at = user_timezone.localize(submitted_at)
+                        submitted_at = scan_history.as_datetime(submitted_at).astimezone(scan_history.LOCAL_TIMEZONE)
                         submitted_str = submitted_at.strftime("%d-%m-%Y %I:%M %p")
                     except Exception as e:
                         st.error(f"Error parsing date for scan {idx}: {str(e)}")
@@ -272,19 +696,43 @@ def previous_scan_page():
                 st.write(f"**Phone Number:** {application.get('phone_number', 'N/A')}")
                 st.write(f"**Prediction:** {application.get('prediction', 'N/A')}")
                 st.write(f"**Confidence:** {application.get('confidence', 0.0):.2f}%")
-                if "image_base64" in application and application["image_base64"]:
+                application_id = str(application["_id"])
+                if application.get("image_ref"):
+                    thumbnail = get_image_thumbnail(application["image_ref"])
+                    if thumbnail:
+                        st.image(thumbnail, caption=f"Preview - Scan {idx}")
+                if st.checkbox(f"Show MRI Scan {idx}", key=f"show_scan_{application_id}"):
                     try:
-                        st.subheader(f"MRI Scan {idx}:")
-                        image = decode_image(application["image_base64"])
-                        st.image(image, caption=f"MRI Image - Scan {idx}", use_container_width =True)
+                        image_bytes = get_application_image(application_id, email)
+                        if image_bytes:
+                            st.image(image_bytes, caption=f"MRI Image - Scan {idx}", use_container_width =True)
+                        else:
+                            st.info(f"No MRI image available for scan {idx}.")
                     except Exception as e:
                         st.error(f"Error displaying image for scan {idx}: {str(e)}")
-                else:
-                    st.info(f"No MRI image available for scan {idx}.")
                 st.markdown("---")
+            col1, col2 = st.columns([1,1])
+            with col1:
+                if page_number > 0 and st.button("⬅ Newer Scans"):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                if next_cursor is not None and st.button("Older Scans ➡"):
+                    cursors.append(next_cursor)
+                    st.rerun()
+            if st.button("📦 Download All Reports"):
+                reports = iter_history_reports(get_applications_collection(), get_blob_store(), email)
+                try:
+                    st.session_state["bulk_report_job"] = get_report_service().submit_bulk(email, reports)
+                    st.session_state.pop("bulk_report_ready", None)
+                except ReportQueueFull as e:
+                    st.warning(str(e))
+            bulk_report_status()
+            bulk_report_download()
         else:
             st.info("No previous scans found.")
         if st.button("Back to Guidelines"):
+            st.session_state.pop("history_cursors", None)
             st.session_state["page"] = "guidelines"
             st.toast("✅ Back to Guidelines Page...", icon="✅")
             time.sleep(0.5)
@@ -300,12 +748,12 @@ def application_form_page():
         age = st.number_input("Age", min_value=0, step=1)
         place = st.text_input("Place")
         phone_number = st.text_input("Phone Number")
-        uploaded_image = st.session_state.get("uploaded_image", None)
+        uploaded_image = st.session_state.get("uploaded_image_preview", None)
         prediction_label = st.session_state.get("prediction_label", "N/A")
         prediction_confidence = st.session_state.get("prediction_confidence", 0.0)
         if uploaded_image:
             st.subheader("Uploaded MRI Scan:")
-            st.image(uploaded_image, caption="MRI Image", use_container_width=True)
+            st.image(uploaded_image, caption="MRI Image")
             st.subheader("Diagnosis Result:")
             st.write(f"🟢 **Prediction:** {prediction_label}")
             st.write(f"📊 **Confidence:** {prediction_confidence:.2f}%")
@@ -321,63 +769,40 @@ def application_form_page():
                 st.error("Phone number must be exactly 10 digits.")
             elif not uploaded_image:
                 st.error("Please upload an MRI image.")
+            elif get_uploaded_image_bytes() is None:
+                st.error("Your uploaded MRI image has expired. Please upload it again on the scan page.")
             else:
-                with st.spinner("Generating report..."):
-                    india_timezone = pytz.timezone('Asia/Kolkata')
-                    current_time = datetime.now(india_timezone)
-                    timestamp = current_time.strftime("%Y%m%d_%H%M%S")
-                    formatted_datetime = current_time.strftime("%d-%m-%Y %H:%M:%S")
-
-                    # Sanitize patient name for filename
-                    sanitized_name = re.sub(r'[^a-zA-Z0-9]', '_', name.strip())
-                    pdf_filename = f"Alzheimer_MRI_Report_{sanitized_name}_{timestamp}.pdf"
-                    temp_image_path = f"temp_mri_image_{sanitized_name}_{timestamp}.jpg"
-
-                    # Save form data
-                    form_data = {
-                        "user_email": st.session_state.get("Email", ""),
-                        "name": name,
-                        "age": int(age),
-                        "place": place,
-                        "phone_number": int(phone_number),
-                        "prediction": prediction_label,
-                        "confidence": float(prediction_confidence),
-                        "image_base64": encode_image(uploaded_image) if uploaded_image else None,
-                        "submitted_at": formatted_datetime
-                    }
-                    save_application_form(form_data)
-
-                    # Save temporary image
-                    uploaded_image.save(temp_image_path)
-
-                    # Generate PDF
-                    pdf_path = generate_pdf(name, age, place, phone_number, temp_image_path, prediction_label, prediction_confidence, pdf_filename, formatted_datetime)
-
-                    # Store PDF path in session state
-                    st.session_state["pdf_path"] = pdf_path
-                    st.success("Report generated successfully!")
-
-                    # Clean up temporary image
-                    try:
-                        os.remove(temp_image_path)
-                    except OSError as e:
-                        st.warning(f"Warning: Could not delete temporary image: {e}")
+                india_timezone = pytz.timezone('Asia/Kolkata')
+                current_time = datetime.now(india_timezone)
+                formatted_datetime = current_time.strftime("%d-%m-%Y %H:%M:%S")
+                image_bytes = get_uploaded_image_bytes()
 
-        # Show download button if PDF is available
-        if "pdf_path" in st.session_state:
-            with open(st.session_state["pdf_path"], "rb") as pdf_file:
-                st.download_button(
-                    label="📥 Download Report",
-                    data=pdf_file,
-                    file_name=os.path.basename(st.session_state["pdf_path"]),
-                    mime="application/pdf"
-                )
-            # Clean up PDF file after download
-            try:
-                os.remove(st.session_state["pdf_path"])
-                del st.session_state["pdf_path"]
-            except OSError as e:
-                st.warning(f"Warning: Could not delete PDF file: {e}")
+                # Save form data
+                form_data = {
+                    "user_email": st.session_state.get("Email", ""),
+                    "name": name,
+                    "age": int(age),
+                    "place": place,
+                    "phone_number": int(phone_number),
+                    "prediction": prediction_label,
+                    "confidence": float(prediction_confidence),
+                    "model_version": st.session_state.get("prediction_model_version"),
+                    "image_ref": store_uploaded_image(image_bytes),
+                    "submitted_at": current_time
+                }
+                st.session_state["application_write"] = save_application_form(form_data)
+                application_id = form_data["_id"]
+
+                # Render the PDF in the background; report_download() polls for it
+                report = dict(form_data, phone_number=phone_number, image=image_bytes, submitted_at=formatted_datetime)
+                try:
+                    st.session_state["report_job"] = get_report_service().submit(str(application_id), report)
+                    st.session_state["report_filename"] = report_filename(name, current_time.strftime("%Y%m%d_%H%M%S"))
+                    st.success("Application submitted! Your report is being generated.")
+                except ReportQueueFull as e:
+                    st.error(str(e))
+
+        report_download()
 
         if st.button("🔁 Guidelines Page"):
             st.session_state["page"] = "guidelines"
@@ -388,42 +813,13 @@ def application_form_page():
     st.markdown('<div class="footer">© 2025 alzheimers-disease-detection</div>', unsafe_allow_html=True)
 
 
-def generate_pdf(name, age, place, phone_number, image_path, diagnosis, confidence, pdf_filename, formatted_datetime):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(200, 10, "Alzheimer's MRI Scan Report", ln=True, align="C")
-    pdf.ln(10)
-    pdf.set_font("Arial", "I", 10)
-    pdf.cell(0, 10, f"Report Generated: {formatted_datetime}", ln=True)
-    pdf.ln(10)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "Patient Details:", ln=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, f"Name: {name}", ln=True)
-    pdf.cell(0, 10, f"Age: {age}", ln=True)
-    pdf.cell(0, 10, f"Place: {place}", ln=True)
-    pdf.cell(0, 10, f"Phone Number: {phone_number}", ln=True)
-    pdf.ln(10)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "Diagnosis Result:", ln=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, f"Prediction: {diagnosis}", ln=True)
-    pdf.cell(0, 10, f"Confidence: {confidence:.2f}%", ln=True)
-    pdf.ln(10)
-    if image_path:
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(200, 10, "MRI Scan:", ln=True)
-        pdf.image(image_path, x=60, w=100)
-        pdf.ln(10)
-    pdf.set_font("Arial", "I", 10)
-    pdf.cell(200, 10, "This report is generated by the Alzheimer's MRI Analysis System.", ln=True, align="C")
-    pdf.output(pdf_filename)
-    return pdf_filename
-
 def main():
+    setup_metrics()
+    if not INFERENCE_SERVICE_URL and secret_flag("EAGER_MODEL_WARMUP", True):
+        get_model_registry()
+    track_session_memory()
     add_responsive_styles()
+    operator_panel()
     if "page" not in st.session_state:
         st.session_state["page"] = "Home"
     pages = {
@@ -433,9 +829,12 @@ def main():
         "guidelines": guidelines_page,
         "scan": scan_page,
         "application_form": application_form_page,
-        "previous_scan": previous_scan_page
+        "previous_scan": previous_scan_page,
+        "batch_scan": batch_scan_page
     }
-    pages[st.session_state["page"]]()
+    with metrics.trace(st.session_state["page"], st.secrets.get("TRACE_FILE")):
+        pages[st.session_state["page"]]()
+    get_startup_timer().mark("first_render")
 
 if __name__ == "__main__":
     main()
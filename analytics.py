@@ -0,0 +1,41 @@
+CONFIDENCE_BUCKETS = [0, 50, 60, 70, 80, 90, 100.0001]
+
+def prediction_summary_pipeline(email):
+    return [
+        {"$match": {"user_email": email}},
+        {"$group": {
+            "_id": "$prediction",
+            "count": {"$sum": 1},
+            "avg_confidence": {"$avg": "$confidence"},
+            "min_confidence": {"$min": "$confidence"},
+            "max_confidence": {"$max": "$confidence"},
+            "std_confidence": {"$stdDevPop": "$confidence"},
+            "last_submitted_at": {"$max": "$submitted_at"},
+        }},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
+
+def confidence_histogram_pipeline(email, boundaries=CONFIDENCE_BUCKETS):
+    return [
+        {"$match": {"user_email": email, "confidence": {"$type": "number"}}},
+        {"$bucket": {"groupBy": "$confidence", "boundaries": boundaries, "default": "other", "output": {"count": {"$sum": 1}}}},
+    ]
+
+def user_prediction_summary(collection, email):
+    summary = []
+    for row in collection.aggregate(prediction_summary_pipeline(email)):
+        row["prediction"] = row.pop("_id")
+        summary.append(row)
+    return summary
+
+def user_confidence_histogram(collection, email):
+    histogram = []
+    for row in collection.aggregate(confidence_histogram_pipeline(email)):
+        lower = row["_id"]
+        if lower == "other":
+            label = "other"
+        else:
+            upper = CONFIDENCE_BUCKETS[CONFIDENCE_BUCKETS.index(lower) + 1]
+            label = f"{lower:g}-{min(upper, 100):g}%"
+        histogram.append({"range": label, "count": row["count"]})
+    return histogram
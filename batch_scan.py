@@ -0,0 +1,157 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from inference import class_labels, load_model_backend, decode_prediction
+from preprocessing import BatchBuffer, decode_into, to_model_input
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# -------------------- Sources --------------------
+def _read_file(path):
+    with open(path, "rb") as image_file:
+        return image_file.read()
+
+def iter_directory(path):
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                full_path = os.path.join(root, filename)
+                yield os.path.relpath(full_path, path), lambda full_path=full_path: _read_file(full_path)
+
+def iter_zip(path):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            data = archive.read(info)
+            yield info.filename, lambda data=data: data
+
+def iter_sources(path):
+    if os.path.isdir(path):
+        return iter_directory(path)
+    if zipfile.is_zipfile(path):
+        return iter_zip(path)
+    raise ValueError(f"{path} is neither a directory nor a zip archive.")
+
+def iter_uploaded_files(uploaded_files):
+    for uploaded_file in uploaded_files:
+        yield uploaded_file.name, uploaded_file.getvalue
+
+# -------------------- Pipeline --------------------
+def _load(name, loader, out):
+    try:
+        decode_into(loader(), out)
+        return name, None
+    except Exception as e:
+        return name, str(e)
+
+def _score(batch, buffer, forward_fn):
+    results = []
+    ready = [index for index, (_, error) in enumerate(batch) if error is None]
+    if len(ready) == len(batch):
+        inputs = buffer.model_input(len(batch))
+    else:
+        inputs = to_model_input(buffer.pixels[ready]) if ready else None
+    outputs = iter(forward_fn(inputs) if ready else [])
+    for name, error in batch:
+        if error is not None:
+            results.append({"file": name, "error": error})
+            continue
+        predictions = next(outputs)
+        predicted_label, confidence = decode_prediction(predictions)
+        result = {"file": name, "prediction": predicted_label, "confidence": float(confidence)}
+        result.update({label: float(p) for label, p in zip(class_labels, predictions)})
+        results.append(result)
+    return results
+
+def score_images(sources, forward_fn, batch_size=32, workers=4, prefetch=None):
+    # Workers decode straight into slots of a small ring of preallocated
+    # uint8 batch buffers while the current batch is on the model; at most
+    # `prefetch` images are in flight, so memory stays flat.
+    prefetch = prefetch or batch_size * 2
+    buffers = [BatchBuffer(batch_size) for _ in range(1 + (batch_size - 1 + prefetch) // batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        sources = iter(sources)
+        submitted = 0
+        exhausted = False
+        batch = []
+        while pending or not exhausted:
+            while not exhausted and len(pending) < prefetch:
+                try:
+                    name, loader = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                buffer = buffers[(submitted // batch_size) % len(buffers)]
+                pending.append(pool.submit(_load, name, loader, buffer.slot(submitted % batch_size)))
+                submitted += 1
+            if not pending:
+                break
+            batch_buffer = buffers[(submitted - len(pending)) // batch_size % len(buffers)]
+            batch.append(pending.popleft().result())
+            if len(batch) >= batch_size:
+                yield from _score(batch, batch_buffer, forward_fn)
+                batch = []
+        if batch:
+            yield from _score(batch, batch_buffer, forward_fn)
+
+# -------------------- Output --------------------
+RESULT_FIELDS = ["file", "prediction", "confidence"] + class_labels + ["error"]
+
+class ResultWriter:
+    def __init__(self, stream, fmt="csv"):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, result):
+        if self._csv:
+            self._csv.writerow(result)
+        else:
+            self.stream.write(json.dumps(result) + "\n")
+        self.stream.flush()
+
+def run_batch(source_path, output, fmt="csv", backend="keras", model_path=None, batch_size=32, workers=4):
+    from inference_engine import build_forward_fn
+    forward_fn = build_forward_fn(load_model_backend(backend, model_path, max_batch_size=batch_size))
+    writer = ResultWriter(output, fmt)
+    count = errors = 0
+    for result in score_images(iter_sources(source_path), forward_fn, batch_size=batch_size, workers=workers):
+        writer.write(result)
+        count += 1
+        errors += "error" in result
+    return count, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a directory or zip of MRI images.")
+    parser.add_argument("source", help="Directory or zip archive of JPEG/PNG scans")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--backend", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--model", default=None, help="Model file (default depends on backend)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("jsonl" if args.output and args.output.endswith(".jsonl") else "csv")
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        count, errors = run_batch(args.source, output, fmt, args.backend, args.model, args.batch_size, args.workers)
+    finally:
+        if args.output:
+            output.close()
+    print(f"Scored {count} images ({errors} failed).", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
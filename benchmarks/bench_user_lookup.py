@@ -0,0 +1,91 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserStore
+
+def get_collection(mongo_url=None):
+    if mongo_url:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_url)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    collection = client["AlzheimersDiseaseDetectionBench"]["users"]
+    collection.drop()
+    return collection
+
+def populate(collection, count):
+    existing = collection.estimated_document_count()
+    docs = [{"email": f"user{i}@example.com", "name": f"User {i}", "password": "Secret!1"} for i in range(existing, count)]
+    if docs:
+        collection.insert_many(docs)
+
+def full_scan_lookup(collection, email):
+    users = {user["email"]: {"name": user["name"], "password": user["password"]} for user in collection.find()}
+    return users.get(email)
+
+def uses_email_index(collection, email):
+    # True when the server plans find_user's query as an IXSCAN on email_unique.
+    plan = collection.find({"email": email}, {"_id": 0, "name": 1, "password": 1}).explain()["queryPlanner"]["winningPlan"]
+    stages = [plan]
+    while stages:
+        stage = stages.pop()
+        if stage.get("stage") == "IXSCAN" and stage.get("indexName") == "email_unique":
+            return True
+        stages.extend(stage.get("inputStages", []))
+        if "inputStage" in stage:
+            stages.append(stage["inputStage"])
+    return False
+
+def time_lookups(lookup, emails, repeat):
+    samples = []
+    for _ in range(repeat):
+        for email in emails:
+            start = time.perf_counter()
+            lookup(email)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare full-scan and indexed user lookups as the user count grows.")
+    parser.add_argument("--mongo-url", help="Benchmark against a real mongod instead of mongomock")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Fail if indexed p50 at the largest size exceeds the smallest size's by this ratio (needs --mongo-url)")
+    args = parser.parse_args(argv)
+
+    collection = get_collection(args.mongo_url)
+    store = UserStore(collection, cache_ttl=0)
+    store.ensure_indexes()
+    print(f"{'users':>8} {'scan p50 ms':>12} {'indexed p50 ms':>15} {'indexed max ms':>15}")
+    indexed = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        populate(collection, size)
+        emails = [f"user{i}@example.com" for i in (0, size // 2, size - 1)] + ["missing@example.com"]
+        scan_p50, _ = time_lookups(lambda email: full_scan_lookup(collection, email), emails, 1)
+        indexed_p50, indexed_max = time_lookups(store.find_user, emails, args.repeat)
+        indexed.append(indexed_p50)
+        print(f"{size:>8} {scan_p50:>12.2f} {indexed_p50:>15.3f} {indexed_max:>15.3f}")
+
+    if not args.mongo_url:
+        # mongomock ignores indexes, so its "indexed" lookups are scans too.
+        print("mongomock does not use indexes; pass --mongo-url to check that indexed lookups stay flat.", file=sys.stderr)
+        return 0
+    if not uses_email_index(collection, emails[0]):
+        print("FAIL: find_user's query does not use an IXSCAN on email_unique.", file=sys.stderr)
+        return 1
+    growth = indexed[-1] / indexed[0] if indexed[0] else 0.0
+    if growth > args.max_growth:
+        print(f"FAIL: indexed p50 grew {growth:.1f}x across sizes (limit {args.max_growth}x).", file=sys.stderr)
+        return 1
+    print(f"OK: IXSCAN on email_unique, indexed p50 grew {growth:.1f}x across sizes.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_access import DATABASE_NAME, WriteBehindQueue, create_client, ensure_indexes
+
+def get_database(mongo_url=None):
+    if mongo_url:
+        client = create_client(mongo_url)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    name = f"{DATABASE_NAME}Bench"
+    client.drop_database(name)
+    db = client[name]
+    ensure_indexes(db)
+    return db
+
+def make_application(i):
+    return {
+        "user_email": f"user{i % 100}@example.com", "name": "Bench Patient", "age": 70,
+        "place": "Bench City", "phone_number": 9999999999, "prediction": "Final CN JPEG",
+        "confidence": 90.0, "image_ref": f"{i:064x}", "submitted_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-request insert_one with the batched write-behind queue.")
+    parser.add_argument("--mongo-url", help="Benchmark against a real mongod instead of mongomock")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args(argv)
+    db = get_database(args.mongo_url)
+
+    collection = db["applications"]
+    start = time.perf_counter()
+    for i in range(args.count):
+        collection.insert_one(make_application(i))
+    sync_elapsed = time.perf_counter() - start
+
+    collection.delete_many({})
+    writes = WriteBehindQueue(collection)
+    start = time.perf_counter()
+    futures = [writes.submit(make_application(i)) for i in range(args.count)]
+    enqueue_elapsed = time.perf_counter() - start
+    ids = [future.result(timeout=60) for future in futures]
+    acked_elapsed = time.perf_counter() - start
+    writes.stop()
+
+    stored = collection.count_documents({"_id": {"$in": ids}})
+    print(f"insert_one:   {args.count / sync_elapsed:>10.0f} docs/s ({sync_elapsed * 1000 / args.count:.3f} ms on the caller per write)")
+    print(f"write-behind: {args.count / acked_elapsed:>10.0f} docs/s ({enqueue_elapsed * 1000 / args.count:.3f} ms on the caller per write)")
+    print(f"batches: {writes.stats()['batches']}, acknowledged and stored: {stored}/{args.count}")
+    if stored != args.count:
+        print("ERROR: some acknowledged writes are missing.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
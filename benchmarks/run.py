@@ -0,0 +1,316 @@
+# Offline benchmarks for the inference, storage and report paths.
+#
+#   python benchmarks/run.py --update-baseline   # record baseline.json on this machine
+#   python benchmarks/run.py                     # compare against it (skipped if absent)
+#   python benchmarks/run.py --require-baseline  # CI: fail when no baseline exists
+#
+# Timings are machine-specific, so the baseline is recorded locally rather
+# than committed.
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from data_access import DataAccess
+from images import encode_image, decode_image
+from inference import IMG_SIZE, class_labels
+from inference_engine import InferenceEngine, build_forward_fn
+import metrics
+import preprocessing
+from reports import generate_pdf
+import scan_history
+from user_store import UserStore, load_all_users
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+# -------------------- Fixtures --------------------
+class StandInModel:
+    # Same 224x224x3 -> 5-class softmax signature as the real model, cheap
+    # enough to run anywhere and deterministic across runs.
+    input_shape = (None, *IMG_SIZE, 3)
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.kernel = rng.standard_normal((3, 4, 4, len(class_labels))).astype(np.float32) / 64
+
+    def forward_batch(self, batch):
+        pooled = batch.reshape(batch.shape[0], 4, IMG_SIZE[0] // 4, 4, IMG_SIZE[1] // 4, 3).mean(axis=(2, 4))
+        logits = np.einsum("bhwc,chwk->bk", pooled, self.kernel)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+def make_scan_bytes(size=(1024, 1024), seed=0, fmt="JPEG"):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1], size[0]), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).convert("RGB").save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+def make_phantom_bytes(size=(2048, 2048), seed=0):
+    # Smooth, MRI-like synthetic slice for parity checks, where pure noise
+    # would exaggerate resampling differences.
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[-1:1:size[1] * 1j, -1:1:size[0] * 1j]
+    head = np.clip(1.0 - (x / 0.8) ** 2 - (y / 0.95) ** 2, 0, 1)
+    ventricles = np.exp(-((x / 0.12) ** 2 + (y / 0.3) ** 2) * 4)
+    pixels = 255 * np.clip(0.8 * head - 0.5 * ventricles + rng.normal(0, 0.01, head.shape), 0, 1)
+    buffer = BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).convert("RGB").save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+def get_database(mongo_url=None):
+    if mongo_url:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_url)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    client.drop_database("AlzheimersDiseaseDetectionBench")
+    return client["AlzheimersDiseaseDetectionBench"]
+
+# -------------------- Measurement --------------------
+def reset_peak_rss():
+    # Linux lets a process reset its RSS high-water mark (VmHWM), so each case
+    # reports its own peak rather than the process-lifetime maximum.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return metrics.max_rss_bytes()
+
+def measure(name, fn, iterations, items=1, warmup=2):
+    isolated = reset_peak_rss()
+    rss_before = metrics.max_rss_bytes()
+    for _ in range(warmup):
+        fn()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    return name, {
+        "iterations": iterations,
+        "items_per_iteration": items,
+        "throughput_per_s": iterations * items / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        # Only this case's peak when isolated; otherwise the process peak so far.
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_rss_isolated": isolated,
+        # How far this case pushed the process-lifetime peak (portable).
+        "rss_growth_bytes": metrics.max_rss_bytes() - rss_before if rss_before is not None else None,
+    }
+
+# -------------------- Cases --------------------
+def bench_images(iterations):
+    scan = make_scan_bytes()
+    image = Image.open(BytesIO(scan))
+    image.load()
+    encoded = encode_image(image)
+    yield measure("preprocess_image", lambda: preprocessing.preprocess_image(scan, draft=False), iterations)
+    yield measure("encode_image", lambda: encode_image(image), iterations)
+    yield measure("decode_image", lambda: decode_image(encoded).load(), iterations)
+
+def bench_preprocess(iterations, batch_size=32):
+    scan = make_phantom_bytes()
+    yield measure("preprocess_image[full]", lambda: preprocessing.preprocess_image(scan, draft=False), iterations)
+    yield measure("preprocess_image[draft]", lambda: preprocessing.preprocess_image(scan), iterations)
+    yield measure(
+        f"preprocess_batch[full,batch={batch_size}]",
+        lambda: np.concatenate([preprocessing.preprocess_image(scan, draft=False) for _ in range(batch_size)]),
+        max(1, iterations // 5), items=batch_size,
+    )
+    buffer = preprocessing.BatchBuffer(batch_size)
+    yield measure(
+        f"preprocess_batch[draft,batch={batch_size}]",
+        lambda: buffer.preprocess([scan] * batch_size),
+        max(1, iterations // 5), items=batch_size,
+    )
+
+def check_preprocess_parity(samples=8, max_mean_abs_diff=4.0):
+    # Pixel-level drift of draft decoding only; whether it changes the real
+    # classifier's answers is checked by export_model.py's parity report.
+    diffs = []
+    for seed in range(samples):
+        scan = make_phantom_bytes(seed=seed)
+        full = preprocessing.preprocess_image(scan, draft=False)
+        draft = preprocessing.preprocess_image(scan)
+        diffs.append(float(np.abs(full - draft).mean()))
+    return {
+        "draft_mean_abs_diff": max(diffs),
+        "passed": max(diffs) <= max_mean_abs_diff,
+    }
+
+def bench_predict(iterations):
+    model = StandInModel()
+    forward_fn = build_forward_fn(model)
+    rng = np.random.default_rng(1)
+    for batch_size in BATCH_SIZES:
+        batch = rng.uniform(0, 255, (batch_size, *IMG_SIZE, 3)).astype(np.float32)
+        yield measure(f"predict[batch={batch_size}]", lambda: forward_fn(batch), iterations, items=batch_size)
+    engine = InferenceEngine(forward_fn, max_batch_size=16, max_wait_ms=1)
+    single = rng.uniform(0, 255, (1, *IMG_SIZE, 3)).astype(np.float32)
+    yield measure("engine_predict[batch=1]", lambda: engine.predict(single), iterations)
+    engine.stop()
+
+def bench_pdf(iterations):
+    scan = make_scan_bytes((512, 512))
+    yield measure(
+        "generate_pdf",
+        lambda: generate_pdf("Bench Patient", 70, "Bench City", "9999999999", scan, class_labels[0], 97.5, "01-01-2025 10:00:00"),
+        iterations,
+    )
+
+def bench_mongo(iterations, mongo_url, users, applications, per_user):
+    db = get_database(mongo_url)
+    users_collection = db["users"]
+    users_collection.insert_many([
+        {"email": f"user{i}@example.com", "name": f"User {i}", "password": "Secret!1"} for i in range(users)
+    ])
+    store = UserStore(users_collection, cache_ttl=0)
+    store.ensure_indexes()
+    yield measure(f"load_users[users={users}]", lambda: load_all_users(users_collection), max(1, iterations // 10))
+    yield measure(f"find_user[users={users}]", lambda: store.find_user(f"user{users // 2}@example.com"), iterations)
+
+    applications_collection = db["applications"]
+    scan_history.ensure_indexes(applications_collection)
+    target = "user0@example.com"
+    docs = []
+    for i in range(applications):
+        email = target if i < per_user else f"user{1 + i % max(1, users - 1)}@example.com"
+        docs.append({
+            "user_email": email, "name": "Bench Patient", "age": 70, "place": "Bench City",
+            "phone_number": 9999999999, "prediction": class_labels[i % len(class_labels)],
+            "confidence": 90.0, "image_ref": f"{i:064x}", "submitted_at": datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+        })
+    applications_collection.insert_many(docs)
+    form = docs[0]
+    data_access = DataAccess(db.client, database_name=db.name)
+    yield measure(
+        f"save_application_form[applications={applications}]",
+        lambda: data_access.save_application({k: v for k, v in form.items() if k != "_id"}).result(),
+        iterations,
+    )
+    data_access.application_writes.stop()
+    yield measure(
+        f"get_previous_applications[history={per_user}]",
+        lambda: scan_history.get_previous_applications(applications_collection, target),
+        iterations,
+    )
+    yield measure(
+        f"get_previous_applications_page[history={per_user}]",
+        lambda: scan_history.list_applications_page(applications_collection, target, 10),
+        iterations,
+    )
+
+# -------------------- Baseline --------------------
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if current["throughput_per_s"] < previous["throughput_per_s"] / (1 + tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_per_s']:.1f} -> {current['throughput_per_s']:.1f}/s")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline inference, storage and report benchmarks.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", default="images,preprocess,predict,pdf,mongo", help="Comma-separated case groups to run")
+    parser.add_argument("--mongo-url", help="Benchmark against a real mongod instead of mongomock")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--applications", type=int, default=20000)
+    parser.add_argument("--history", type=int, default=200, help="Applications belonging to the benchmarked user")
+    parser.add_argument("-o", "--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--no-compare", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true", help="Exit 2 when no baseline exists instead of skipping the comparison")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before failing")
+    args = parser.parse_args(argv)
+
+    groups = set(args.only.split(","))
+    cases = []
+    if "images" in groups:
+        cases.append(bench_images(args.iterations))
+    if "preprocess" in groups:
+        cases.append(bench_preprocess(args.iterations))
+    if "predict" in groups:
+        cases.append(bench_predict(args.iterations))
+    if "pdf" in groups:
+        cases.append(bench_pdf(args.iterations))
+    if "mongo" in groups:
+        cases.append(bench_mongo(args.iterations, args.mongo_url, args.users, args.applications, args.history))
+    results = {}
+    for case in cases:
+        for name, result in case:
+            results[name] = result
+            print(f"{name:<55} p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  {result['throughput_per_s']:>10.1f}/s", file=sys.stderr)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if "preprocess" in groups:
+        report["preprocess_parity"] = check_preprocess_parity()
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(payload + "\n")
+    else:
+        print(payload)
+
+    if not report.get("preprocess_parity", {"passed": True})["passed"]:
+        print(f"PREPROCESSING PARITY FAILED: {report['preprocess_parity']}", file=sys.stderr)
+        return 1
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            baseline_file.write(payload + "\n")
+        print(f"Baseline written to {args.baseline}.", file=sys.stderr)
+        return 0
+    if args.no_compare:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.", file=sys.stderr)
+        return 2 if args.require_baseline else 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.tolerance)
+    if regressions:
+        print("PERFORMANCE REGRESSIONS:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+    print("No regressions against baseline.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+THUMBNAIL_SIZE = (160, 160)
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    image = Image.open(BytesIO(data))
+    image.draft("RGB", size)
+    image = image.convert("RGB")
+    image.thumbnail(size)
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+class LocalBlobStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, suffix=""):
+        return os.path.join(self.root, key[:2], f"{key}{suffix}")
+
+    def _write(self, path, data):
+        # Blobs are content-addressed, so a target that already exists holds
+        # the same bytes. Each writer uses its own temp file, so concurrent
+        # puts of the same scan never share a half-written file.
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as blob_file:
+                blob_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if not os.path.exists(path):
+                raise
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as blob_file:
+                return blob_file.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, data):
+        key = content_key(data)
+        if not self.exists(key):
+            self._write(self._path(key, ".thumb.jpg"), make_thumbnail(data))
+            self._write(self._path(key), data)
+        return key
+
+    def get(self, key):
+        return self._read(self._path(key))
+
+    def get_thumbnail(self, key):
+        return self._read(self._path(key, ".thumb.jpg"))
+
+class GridFSBlobStore:
+    def __init__(self, db, bucket_name="scans"):
+        import gridfs
+        self._gridfs = gridfs
+        self.blobs = gridfs.GridFSBucket(db, bucket_name=bucket_name)
+        self.thumbnails = gridfs.GridFSBucket(db, bucket_name=f"{bucket_name}_thumbnails")
+        self._files = db[f"{bucket_name}.files"]
+
+    def exists(self, key):
+        return self._files.count_documents({"_id": key}, limit=1) > 0
+
+    def _upload(self, bucket, key, data):
+        try:
+            bucket.upload_from_stream_with_id(key, key, BytesIO(data))
+        except self._gridfs.errors.FileExists:
+            pass
+
+    def put(self, data):
+        key = content_key(data)
+        if not self.exists(key):
+            self._upload(self.thumbnails, key, make_thumbnail(data))
+            self._upload(self.blobs, key, data)
+        return key
+
+    def _download(self, bucket, key):
+        try:
+            return bucket.open_download_stream(key).read()
+        except self._gridfs.errors.NoFile:
+            return None
+
+    def get(self, key):
+        return self._download(self.blobs, key)
+
+    def get_thumbnail(self, key):
+        return self._download(self.thumbnails, key)
+
+def open_blob_store(db, local_dir=None):
+    if local_dir:
+        return LocalBlobStore(local_dir)
+    return GridFSBlobStore(db)
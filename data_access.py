@@ -0,0 +1,157 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import scan_history
+from user_store import UserStore
+
+DATABASE_NAME = "AlzheimersDiseaseDetection"
+
+DEFAULT_CLIENT_SETTINGS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 2,
+    "maxIdleTimeMS": 300000,
+    "waitQueueTimeoutMS": 5000,
+    "serverSelectionTimeoutMS": 5000,
+    "connectTimeoutMS": 5000,
+    "socketTimeoutMS": 20000,
+    "compressors": "zlib",
+    "readPreference": "primaryPreferred",
+    "retryWrites": True,
+    "retryReads": True,
+    "tz_aware": True,
+    "appname": "alzheimers-disease-detection",
+}
+
+def create_client(mongo_url, **overrides):
+    from pymongo import MongoClient
+    settings = dict(DEFAULT_CLIENT_SETTINGS, **overrides)
+    return MongoClient(mongo_url, **settings)
+
+def ensure_indexes(db):
+    UserStore(db["users"]).ensure_indexes()
+    scan_history.ensure_indexes(db["applications"])
+
+# -------------------- Write-Behind Queue --------------------
+class WriteBehindQueue:
+    # Batches inserts on a background thread with insert_many. Each submit()
+    # returns a Future that resolves to the document _id once the server has
+    # acknowledged the write, or raises if it failed.
+    def __init__(self, collection, max_batch_size=100, flush_interval=0.05, max_queue=1000, shutdown_timeout=10):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self._submit_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.sync_fallbacks = 0
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._worker.start()
+        # The worker is a daemon thread, so drain queued writes at interpreter
+        # exit instead of dropping them.
+        atexit.register(self.stop, shutdown_timeout)
+
+    def submit(self, document):
+        from bson import ObjectId
+        document.setdefault("_id", ObjectId())
+        future = Future()
+        # Holding the lock across the check and the put means stop() cannot
+        # slip in between and leave a write behind in a queue nobody drains.
+        with self._submit_lock:
+            if not self._stopped.is_set():
+                try:
+                    self._queue.put_nowait((document, future))
+                    return future
+                except queue.Full:
+                    # Backpressure: when the queue is full, write on the caller's thread.
+                    with self._lock:
+                        self.sync_fallbacks += 1
+        return self._insert_now(document, future)
+
+    def _insert_now(self, document, future):
+        try:
+            future.set_result(self.collection.insert_one(document).inserted_id)
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from pymongo.errors import BulkWriteError
+        failed = {}
+        try:
+            self.collection.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "Write failed.") for error in e.details.get("writeErrors", [])}
+            if e.details.get("writeConcernErrors"):
+                failed.update({index: "Write concern not satisfied." for index in range(len(batch)) if index not in failed})
+        except Exception as e:
+            failed = {index: str(e) for index in range(len(batch))}
+        for index, (document, future) in enumerate(batch):
+            if index in failed:
+                future.set_exception(RuntimeError(failed[index]))
+            else:
+                future.set_result(document["_id"])
+        with self._lock:
+            self.batches += 1
+            self.failed += len(failed)
+            self.written += len(batch) - len(failed)
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def stop(self, timeout=5):
+        # The worker keeps writing until the queue is empty, then exits.
+        with self._submit_lock:
+            self._stopped.set()
+        self._worker.join(timeout)
+        return not self._worker.is_alive()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "sync_fallbacks": self.sync_fallbacks,
+            }
+
+# -------------------- Data Access --------------------
+class DataAccess:
+    def __init__(self, client, database_name=DATABASE_NAME, write_batch_size=100, write_flush_interval=0.05):
+        self.client = client
+        self.db = client[database_name]
+        self.users = self.db["users"]
+        self.applications = self.db["applications"]
+        self.application_writes = WriteBehindQueue(self.applications, write_batch_size, write_flush_interval)
+
+    def ensure_indexes(self):
+        ensure_indexes(self.db)
+
+    def save_application(self, document):
+        return self.application_writes.submit(document)
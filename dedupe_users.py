@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+
+from data_access import DATABASE_NAME, create_client
+from user_store import UserStore, find_duplicate_emails, remove_duplicate_users
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate user emails (keeping the earliest account) and build the unique email index.")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"))
+    parser.add_argument("--dry-run", action="store_true", help="Only report duplicates")
+    args = parser.parse_args(argv)
+    if not args.mongo_url:
+        parser.error("MongoDB URL not found. Pass --mongo-url or set MONGO_URL.")
+
+    users = create_client(args.mongo_url)[DATABASE_NAME]["users"]
+    duplicates = find_duplicate_emails(users)
+    for email, ids in duplicates.items():
+        print(f"{email}: keeping {ids[0]}, removing {len(ids) - 1}", file=sys.stderr)
+    removed = remove_duplicate_users(users, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"Would remove {removed} duplicate users.", file=sys.stderr)
+        return 0
+    print(f"Removed {removed} duplicate users.", file=sys.stderr)
+    return 0 if UserStore(users).ensure_indexes() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
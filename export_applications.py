@@ -0,0 +1,149 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from data_access import DATABASE_NAME, create_client
+from scan_history import as_datetime
+
+EXPORT_FIELDS = ["_id", "user_email", "name", "age", "place", "phone_number", "prediction", "confidence", "model_version", "image_ref", "submitted_at"]
+EXPORT_PROJECTION = {field: 1 for field in EXPORT_FIELDS}
+EXPORT_SORT = [("submitted_at", 1), ("_id", 1)]
+NON_DATE_QUERY = {"submitted_at": {"$not": {"$type": "date"}}}
+DEFAULT_LAG_SECONDS = 300
+
+# -------------------- Watermark --------------------
+def load_watermark(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r") as watermark_file:
+        watermark = json.load(watermark_file)
+    from bson import ObjectId
+    return datetime.fromisoformat(watermark["submitted_at"]), ObjectId(watermark["_id"])
+
+def save_watermark(path, watermark):
+    submitted_at, last_id = watermark
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as watermark_file:
+        json.dump({"submitted_at": submitted_at.isoformat(), "_id": str(last_id)}, watermark_file)
+    os.replace(tmp_path, path)
+
+# -------------------- Streaming --------------------
+def iter_applications(collection, after=None, since=None, until=None, batch_size=1000):
+    # Streams in (submitted_at, _id) order with image payloads projected out,
+    # so memory stays constant and the export index serves the range scan.
+    # Rows without a date submitted_at are skipped; see count_skipped().
+    query = {"submitted_at": {"$type": "date"}}
+    if since is not None:
+        query["submitted_at"]["$gte"] = since
+    if until is not None:
+        query["submitted_at"]["$lt"] = until
+    if after is not None:
+        submitted_at, last_id = after
+        query["$or"] = [
+            {"submitted_at": {"$gt": submitted_at}},
+            {"submitted_at": submitted_at, "_id": {"$gt": last_id}},
+        ]
+    cursor = collection.find(query, EXPORT_PROJECTION).sort(EXPORT_SORT).batch_size(batch_size)
+    for application in cursor:
+        row = {field: application.get(field) for field in EXPORT_FIELDS}
+        row["_id"] = str(row["_id"])
+        row["submitted_at"] = as_datetime(application["submitted_at"])
+        yield row, (application["submitted_at"], application["_id"])
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="") if path != "-" else sys.stdout
+        self._writer = csv.DictWriter(self._file, fieldnames=EXPORT_FIELDS)
+        self._writer.writeheader()
+
+    def write_batch(self, rows):
+        for row in rows:
+            self._writer.writerow(dict(row, submitted_at=row["submitted_at"].isoformat()))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet export requires pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([
+            ("_id", pa.string()), ("user_email", pa.string()), ("name", pa.string()), ("age", pa.int64()),
+            ("place", pa.string()), ("phone_number", pa.int64()), ("prediction", pa.string()),
+            ("confidence", pa.float64()), ("model_version", pa.string()), ("image_ref", pa.string()), ("submitted_at", pa.timestamp("ms", tz="UTC")),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write_batch(self, rows):
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+def count_skipped(collection):
+    # Legacy string (or missing) submitted_at values cannot be range-scanned;
+    # migrate_submitted_at.py converts them.
+    return collection.count_documents(NON_DATE_QUERY)
+
+def export(collection, sink, after=None, since=None, until=None, batch_size=1000):
+    count = 0
+    watermark = after
+    batch = []
+    for row, position in iter_applications(collection, after, since, until, batch_size):
+        batch.append(row)
+        watermark = position
+        if len(batch) >= batch_size:
+            sink.write_batch(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        sink.write_batch(batch)
+        count += len(batch)
+    return count, watermark
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream applications (without images) to CSV or Parquet.")
+    parser.add_argument("-o", "--output", required=True, help="Output file ('-' for CSV on stdout)")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"))
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only export applications submitted at or after this ISO timestamp")
+    parser.add_argument("--watermark", help="Watermark file; exports only applications newer than it and advances it on success")
+    parser.add_argument("--lag", type=float, default=DEFAULT_LAG_SECONDS,
+                        help="Only export applications submitted more than this many seconds ago, so writes still "
+                             "queued or replicating are not skipped past by the watermark")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    if not args.mongo_url:
+        parser.error("MongoDB URL not found. Pass --mongo-url or set MONGO_URL.")
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+
+    collection = create_client(args.mongo_url)[DATABASE_NAME]["applications"]
+    since = as_datetime(args.since) if args.since else None
+    # submitted_at is set when the form is submitted, but the write-behind
+    # queue or a lagging replica may commit it later; stopping short of "now"
+    # keeps the watermark from moving past rows that are not visible yet.
+    until = datetime.now(timezone.utc) - timedelta(seconds=args.lag)
+    sink = ParquetSink(args.output) if fmt == "parquet" else CsvSink(args.output)
+    try:
+        count, watermark = export(collection, sink, load_watermark(args.watermark), since, until, args.batch_size)
+    finally:
+        sink.close()
+    if args.watermark and watermark is not None:
+        save_watermark(args.watermark, watermark)
+    print(f"Exported {count} applications.", file=sys.stderr)
+    skipped = count_skipped(collection)
+    if skipped:
+        print(f"Skipped {skipped} applications without a date submitted_at; run migrate_submitted_at.py to include them.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import argparse
+import hashlib
+import json
+import sys
+
+import numpy as np
+
+from batch_scan import iter_sources
+from inference import MODEL_PATH, TFLITE_MODEL_PATH, class_labels, load_keras_model, TFLiteModel
+from preprocessing import load_image_array, to_model_input
+
+# -------------------- Calibration --------------------
+def is_parity_sample(name, parity_fraction):
+    # Split by a hash of the file name so the held-out parity set is stable
+    # across runs and mixes classes instead of taking whole sorted folders.
+    bucket = int(hashlib.sha256(name.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return bucket < parity_fraction
+
+def load_sample_sets(source_path, calibration_size=200, parity_size=100, parity_fraction=0.3):
+    # Returns (calibration, parity, parity_full) model inputs. Calibration and
+    # parity are disjoint and decoded exactly as serving decodes them (JPEG
+    # draft mode); parity_full is the parity set decoded at full resolution,
+    # to measure what draft decoding costs the real classifier.
+    calibration, parity, parity_full = [], [], []
+    for name, loader in iter_sources(source_path):
+        held_out = is_parity_sample(name, parity_fraction)
+        target, limit = (parity, parity_size) if held_out else (calibration, calibration_size)
+        if len(target) >= limit:
+            if len(calibration) >= calibration_size and len(parity) >= parity_size:
+                break
+            continue
+        try:
+            data = loader()
+            pixels = load_image_array(data)
+            full = load_image_array(data, draft=False) if held_out else None
+        except Exception as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+            continue
+        target.append(pixels)
+        if held_out:
+            parity_full.append(full)
+    if not calibration:
+        raise ValueError(f"No usable calibration images found in {source_path}.")
+    if not parity:
+        raise ValueError(f"No held-out parity images found in {source_path}.")
+    return to_model_input(np.stack(calibration)), to_model_input(np.stack(parity)), to_model_input(np.stack(parity_full))
+
+# -------------------- Export --------------------
+def export_tflite(keras_model, output_path, quantization="float16", calibration=None):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if calibration is None:
+            raise ValueError("int8 quantization requires a calibration set.")
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[np.newaxis, ...]]
+        converter.representative_dataset = representative_dataset
+    elif quantization != "dynamic":
+        raise ValueError(f"Unknown quantization mode: {quantization}")
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as model_file:
+        model_file.write(tflite_model)
+    return len(tflite_model)
+
+# -------------------- Parity Check --------------------
+def _run_batches(forward, samples, batch_size):
+    return np.concatenate([np.asarray(forward(samples[start:start + batch_size])) for start in range(0, len(samples), batch_size)])
+
+def check_parity(keras_model, tflite_model, samples, full_samples=None, batch_size=16):
+    # `samples` are decoded the way serving decodes them; `full_samples`, the
+    # same images decoded at full resolution, add the draft-decoding check.
+    keras_forward = lambda batch: keras_model(batch, training=False)
+    reference = _run_batches(keras_forward, samples, batch_size)
+    candidate = _run_batches(tflite_model.forward_batch, samples, batch_size)
+    reference_classes = reference.argmax(axis=1)
+    candidate_classes = candidate.argmax(axis=1)
+    per_class = {}
+    for idx, label in enumerate(class_labels):
+        mask = reference_classes == idx
+        per_class[label] = {
+            "samples": int(mask.sum()),
+            "agreement": float((candidate_classes[mask] == idx).mean()) if mask.any() else None,
+        }
+    report = {
+        "samples": int(len(samples)),
+        "top1_agreement": float((reference_classes == candidate_classes).mean()),
+        "max_abs_prob_diff": float(np.abs(reference - candidate).max()),
+        "mean_abs_prob_diff": float(np.abs(reference - candidate).mean()),
+        "per_class": per_class,
+    }
+    if full_samples is not None:
+        full_classes = _run_batches(keras_forward, full_samples, batch_size).argmax(axis=1)
+        report["draft_decode"] = {
+            "top1_agreement": float((reference_classes == full_classes).mean()),
+            "mean_abs_input_diff": float(np.abs(samples - full_samples).mean()),
+            "end_to_end_top1_agreement": float((candidate_classes == full_classes).mean()),
+        }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the Keras model to a quantized TFLite artifact.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("-o", "--output", default=TFLITE_MODEL_PATH)
+    parser.add_argument("-q", "--quantization", choices=["float16", "int8", "dynamic"], default="float16")
+    parser.add_argument("--calibration", required=True, help="Directory or zip of MRI images, split into calibration and held-out parity sets")
+    parser.add_argument("--calibration-size", type=int, default=200)
+    parser.add_argument("--parity-size", type=int, default=100)
+    parser.add_argument("--parity-fraction", type=float, default=0.3, help="Share of images held out for the parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args(argv)
+
+    keras_model = load_keras_model(args.model)
+    calibration, parity, parity_full = load_sample_sets(args.calibration, args.calibration_size, args.parity_size, args.parity_fraction)
+    size = export_tflite(keras_model, args.output, args.quantization, calibration)
+    report = check_parity(keras_model, TFLiteModel(args.output), parity, parity_full)
+    report.update({"quantization": args.quantization, "artifact": args.output, "artifact_bytes": size, "calibration_samples": int(len(calibration))})
+    with open(f"{args.output}.parity.json", "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(json.dumps(report, indent=2))
+    if report["top1_agreement"] < args.min_agreement:
+        print(f"Top-1 agreement {report['top1_agreement']:.4f} is below {args.min_agreement}.", file=sys.stderr)
+        return 1
+    if report["draft_decode"]["top1_agreement"] < args.min_agreement:
+        print(f"Draft-decoding top-1 agreement {report['draft_decode']['top1_agreement']:.4f} is below {args.min_agreement}.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
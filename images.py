@@ -0,0 +1,20 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from metrics import timed
+
+@timed("encode_image")
+def encode_image(image):
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return encoded
+
+@timed("decode_image")
+def decode_image(encoded_image):
+    decoded = base64.b64decode(encoded_image)
+    buffer = BytesIO(decoded)
+    image = Image.open(buffer)
+    return image
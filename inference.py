@@ -0,0 +1,110 @@
+import threading
+
+import numpy as np
+
+MODEL_PATH = "20_04_2025_ADNI_best_model.keras"
+TFLITE_MODEL_PATH = "20_04_2025_ADNI_best_model.tflite"
+IMG_SIZE = (224, 224)
+class_labels = ['Final AD JPEG', 'Final CN JPEG', 'Final EMCI JPEG', 'Final LMCI JPEG', 'Final MCI JPEG']
+
+def preprocess_input(x):
+    # Same as tensorflow.keras.applications.efficientnet.preprocess_input, which
+    # is a pass-through because EfficientNet rescales inside the model. Kept
+    # local so preprocessing does not import TensorFlow.
+    return x
+
+# -------------------- Model Backends --------------------
+def load_keras_model(model_path=MODEL_PATH):
+    from tensorflow.keras.models import load_model
+    return load_model(model_path)
+
+def _tflite_interpreter(model_path, num_threads):
+    # Prefer the standalone LiteRT runtime so serving does not need TensorFlow.
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+class TFLiteModel:
+    # Keeps two interpreters, one for single images and one sized to
+    # max_batch_size, and zero-pads larger micro-batches to the latter, so
+    # varying batch sizes never trigger resize_tensor_input()/allocate_tensors()
+    # and only two copies of the model's tensors are ever allocated.
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None, max_batch_size=16):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.max_batch_size = max_batch_size
+        self._runners = {}
+        self._lock = threading.Lock()
+        self._runner(1)
+
+    def _runner(self, batch_size):
+        with self._lock:
+            runner = self._runners.get(batch_size)
+            if runner is None:
+                interpreter = _tflite_interpreter(self.model_path, self.num_threads)
+                input_details = interpreter.get_input_details()[0]
+                if batch_size != 1:
+                    interpreter.resize_tensor_input(input_details["index"], [batch_size, *input_details["shape"][1:]])
+                interpreter.allocate_tensors()
+                runner = (interpreter, interpreter.get_input_details()[0], interpreter.get_output_details()[0], threading.Lock())
+                self._runners[batch_size] = runner
+            return runner
+
+    def _bucket(self, n):
+        return 1 if n == 1 else self.max_batch_size
+
+    def _quantize(self, batch, details):
+        scale, zero_point = details["quantization"]
+        if scale:
+            batch = np.round(batch / scale + zero_point)
+        dtype = details["dtype"]
+        if np.issubdtype(dtype, np.integer):
+            # Out-of-range values would otherwise wrap around on the cast.
+            limits = np.iinfo(dtype)
+            batch = np.clip(batch, limits.min, limits.max)
+        return batch.astype(dtype)
+
+    def _dequantize(self, output, details):
+        scale, zero_point = details["quantization"]
+        if scale:
+            return (output.astype(np.float32) - zero_point) * scale
+        return output.astype(np.float32)
+
+    def _invoke(self, chunk):
+        count = len(chunk)
+        batch_size = self._bucket(count)
+        if batch_size > count:
+            padding = np.zeros((batch_size - count, *chunk.shape[1:]), dtype=np.float32)
+            chunk = np.concatenate([chunk, padding])
+        interpreter, input_details, output_details, lock = self._runner(batch_size)
+        with lock:
+            interpreter.set_tensor(input_details["index"], self._quantize(chunk, input_details))
+            interpreter.invoke()
+            output = interpreter.get_tensor(output_details["index"])
+        return self._dequantize(output, output_details)[:count]
+
+    def forward_batch(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        outputs = [self._invoke(batch[start:start + self.max_batch_size]) for start in range(0, len(batch), self.max_batch_size)]
+        return np.concatenate(outputs)
+
+    def predict(self, batch, verbose=0):
+        return self.forward_batch(batch)
+
+def load_model_backend(backend="keras", model_path=None, num_threads=None, max_batch_size=16):
+    if backend == "tflite":
+        return TFLiteModel(model_path or TFLITE_MODEL_PATH, num_threads=num_threads, max_batch_size=max_batch_size)
+    if backend == "keras":
+        return load_keras_model(model_path or MODEL_PATH)
+    raise ValueError(f"Unknown model backend: {backend}")
+
+# -------------------- Predictions --------------------
+def decode_prediction(predictions):
+    predicted_class = np.argmax(predictions)
+    confidence = predictions[predicted_class] * 100
+    return class_labels[predicted_class], confidence
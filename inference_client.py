@@ -0,0 +1,87 @@
+import base64
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from inference import class_labels
+
+class InferenceServiceError(Exception):
+    pass
+
+class InferenceClient:
+    def __init__(self, base_url, pool_size=16, timeout=35, retries=3):
+        # `timeout` should exceed the service's request_timeout (30 s by
+        # default) so the service answers 504 before the client gives up.
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Only retry when the service has done no work: connection failures
+        # and 503 (saturated or still loading). A read timeout or 504 means
+        # a worker is still busy with the job, so retrying would queue a
+        # duplicate on a service that is already full.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            other=0,
+            status=retries,
+            backoff_factor=0.2,
+            status_forcelist=(503,),
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise InferenceServiceError(f"Inference service unavailable: {e}") from e
+        try:
+            payload = response.json() if response.content else {}
+        except ValueError:
+            # e.g. an HTML error page from a proxy in front of the service
+            raise InferenceServiceError(f"Inference service returned HTTP {response.status_code} with a non-JSON body.")
+        if response.status_code >= 400:
+            raise InferenceServiceError(payload.get("error", f"Inference service returned HTTP {response.status_code}."))
+        return payload
+
+    def ready(self):
+        return self._request("GET", "/readyz")
+
+    def model_id(self):
+        return self.ready()["model_id"]
+
+    def predict(self, image_bytes):
+        result = self._request("POST", "/predict", data=image_bytes, headers={"Content-Type": "application/octet-stream"})
+        predictions = np.array([result["probabilities"][label] for label in class_labels], dtype=np.float32)
+        return result["prediction"], result["confidence"], predictions, result["model_id"]
+
+    def predict_batch(self, images):
+        payload = {"images": [base64.b64encode(image).decode() for image in images]}
+        return self._request("POST", "/predict/batch", json=payload)["results"]
+
+    def score_files(self, sources, batch_size=16):
+        # Same result rows as batch_scan.score_images(), scored remotely.
+        batch = []
+        for name, loader in sources:
+            batch.append((name, loader()))
+            if len(batch) >= batch_size:
+                yield from self._score(batch)
+                batch = []
+        if batch:
+            yield from self._score(batch)
+
+    def _score(self, batch):
+        results = self.predict_batch([image for _, image in batch])
+        for (name, _), result in zip(batch, results):
+            if "error" in result:
+                yield {"file": name, "error": result["error"]}
+                continue
+            row = {"file": name, "prediction": result["prediction"], "confidence": result["confidence"]}
+            row.update(result["probabilities"])
+            yield row
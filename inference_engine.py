@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def build_forward_fn(model):
+    if hasattr(model, "forward_batch"):
+        return model.forward_batch
+
+    import tensorflow as tf
+
+    # A batch-agnostic signature means warm-up traces the graph once for every batch size.
+    input_shape = getattr(model, "input_shape", None)
+    signature = [tf.TensorSpec([None, *input_shape[1:]], tf.float32)] if input_shape else None
+
+    @tf.function(input_signature=signature, reduce_retracing=True)
+    def forward(batch):
+        return model(batch, training=False)
+
+    def run(batch):
+        return forward(tf.convert_to_tensor(batch)).numpy()
+
+    return run
+
+
+class _Request:
+    __slots__ = ("array", "future", "enqueued_at")
+
+    def __init__(self, array):
+        self.array = array
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceEngine:
+    def __init__(self, forward_fn, max_batch_size=16, max_wait_ms=5, stats_window=1024):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._stats_lock = threading.Lock()
+        self.requests_served = 0
+        self.batches_run = 0
+        self._stopped = threading.Event()
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        return cls(build_forward_fn(model), **kwargs)
+
+    def submit(self, img_array):
+        # Copy so callers may reuse their input buffer as soon as this returns.
+        requests = [_Request(row) for row in np.array(img_array, dtype=np.float32)]
+        with self._submit_lock:
+            if self._stopped.is_set():
+                raise RuntimeError("Inference engine has been stopped.")
+            for request in requests:
+                self._queue.put(request)
+        return [request.future for request in requests]
+
+    def predict(self, img_array, timeout=None):
+        futures = self.submit(img_array)
+        return np.stack([future.result(timeout=timeout) for future in futures])
+
+    def _collect_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # After stop() the worker keeps going until the queue is drained, so
+        # every accepted request gets a result.
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                outputs = self.forward_fn(np.stack([request.array for request in batch]))
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished_at = time.perf_counter()
+            for request, output in zip(batch, outputs):
+                request.future.set_result(np.asarray(output))
+            with self._stats_lock:
+                self.batches_run += 1
+                self.requests_served += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend((finished_at - request.enqueued_at) * 1000 for request in batch)
+
+    def stop(self, timeout=1):
+        with self._submit_lock:
+            self._stopped.set()
+        self._worker.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+            batch_sizes = np.array(self._batch_sizes) if self._batch_sizes else np.zeros(1)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests_served": self.requests_served,
+                "batches_run": self.batches_run,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "mean_batch_size": float(batch_sizes.mean()),
+                "latency_p50_ms": float(np.percentile(latencies, 50)),
+                "latency_p90_ms": float(np.percentile(latencies, 90)),
+                "latency_p99_ms": float(np.percentile(latencies, 99)),
+            }
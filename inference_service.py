@@ -0,0 +1,208 @@
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from inference import IMG_SIZE, MODEL_PATH, TFLITE_MODEL_PATH, class_labels, decode_prediction
+from prediction_cache import model_fingerprint
+
+# -------------------- Worker Process --------------------
+_worker = {}
+
+def _init_worker(backend, model_path, max_batch_size):
+    from inference import load_model_backend
+    from inference_engine import build_forward_fn
+    from preprocessing import BatchBuffer
+    _worker["forward_fn"] = build_forward_fn(load_model_backend(backend, model_path, max_batch_size=max_batch_size))
+    _worker["buffer"] = BatchBuffer(max_batch_size)
+
+def _warm_up():
+    _worker["forward_fn"](np.zeros((1, *IMG_SIZE, 3), dtype=np.float32))
+    return os.getpid()
+
+def _predict_batch(images):
+    from preprocessing import decode_into
+    buffer = _worker["buffer"]
+    results = [None] * len(images)
+    ready = []
+    for index, image_bytes in enumerate(images):
+        try:
+            decode_into(image_bytes, buffer.slot(len(ready)))
+            ready.append(index)
+        except Exception as e:
+            results[index] = {"error": f"Could not decode image: {e}"}
+    if ready:
+        outputs = _worker["forward_fn"](buffer.model_input(len(ready)))
+        for index, predictions in zip(ready, outputs):
+            predicted_label, confidence = decode_prediction(predictions)
+            results[index] = {
+                "prediction": predicted_label,
+                "confidence": float(confidence),
+                "probabilities": {label: float(p) for label, p in zip(class_labels, predictions)},
+            }
+    return results
+
+# -------------------- Service --------------------
+class InferenceService:
+    def __init__(self, backend="keras", model_path=None, workers=2, max_inflight=32, max_batch_size=32, request_timeout=30):
+        model_path = model_path or (TFLITE_MODEL_PATH if backend == "tflite" else MODEL_PATH)
+        self.model_id = model_fingerprint(model_path)
+        self.max_batch_size = max_batch_size
+        self.request_timeout = request_timeout
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, model_path, max_batch_size),
+        )
+        self._warmups = [self._pool.submit(_warm_up) for _ in range(workers)]
+
+    def is_ready(self):
+        return all(future.done() and future.exception() is None for future in self._warmups)
+
+    def warmup_error(self):
+        for future in self._warmups:
+            if future.done() and future.exception() is not None:
+                return str(future.exception())
+        return None
+
+    def wait_ready(self, timeout=None):
+        wait(self._warmups, timeout=timeout)
+        return self.is_ready()
+
+    def predict(self, images):
+        # Returns None when the service is saturated so the caller can shed load.
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._pool.submit(_predict_batch, images)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the worker finishes, not when the request
+        # gives up, so timed-out jobs still count against max_inflight.
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.request_timeout)
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so the client's pooled connections are actually reused;
+    # every response carries a Content-Length.
+    protocol_version = "HTTP/1.1"
+    service = None
+    max_body_bytes = 64 * 1024 * 1024
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, status, payload, headers=None):
+        # Sent before the request body was read; the unread bytes would be
+        # parsed as the next request, so close the connection instead.
+        self.close_connection = True
+        self._send_json(status, payload, dict(headers or {}, Connection="close"))
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > self.max_body_bytes:
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            if self.service.is_ready():
+                self._send_json(200, {"status": "ready", "model_id": self.service.model_id, "class_labels": class_labels})
+            else:
+                self._send_json(503, {"status": "warming_up", "error": self.service.warmup_error()})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path not in ("/predict", "/predict/batch"):
+            self._reject(404, {"error": "Not found"})
+            return
+        if not self.service.is_ready():
+            self._reject(503, {"error": "Model is still loading."}, {"Retry-After": "1"})
+            return
+        body = self._read_body()
+        if body is None:
+            self._reject(400, {"error": "Request body is empty or too large."})
+            return
+        if self.path == "/predict":
+            images = [body]
+        else:
+            try:
+                images = [base64.b64decode(image) for image in json.loads(body)["images"]]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": 'Expected JSON {"images": [<base64>, ...]}.'})
+                return
+            if not images or len(images) > self.service.max_batch_size:
+                self._send_json(400, {"error": f"Batch must contain 1-{self.service.max_batch_size} images."})
+                return
+        try:
+            results = self.service.predict(images)
+        except FutureTimeoutError:
+            self._send_json(504, {"error": "Prediction timed out."})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        if results is None:
+            self._send_json(503, {"error": "Service is at capacity."}, {"Retry-After": "1"})
+        elif self.path == "/predict":
+            self._send_json(422 if "error" in results[0] else 200, dict(results[0], model_id=self.service.model_id))
+        else:
+            self._send_json(200, {"model_id": self.service.model_id, "results": results})
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(service, host="0.0.0.0", port=8080):
+    handler = type("InferenceHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless HTTP inference service for the MRI classifier.")
+    parser.add_argument("--host", default=os.environ.get("INFERENCE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("INFERENCE_PORT", 8080)))
+    parser.add_argument("--backend", choices=["keras", "tflite"], default=os.environ.get("MODEL_BACKEND", "keras"))
+    parser.add_argument("--model", default=None, help="Model file (default depends on backend)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("INFERENCE_WORKERS", 2)))
+    parser.add_argument("--max-inflight", type=int, default=32, help="Requests beyond this get 503 + Retry-After")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    service = InferenceService(args.backend, args.model, args.workers, args.max_inflight, args.max_batch_size)
+    server = serve(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} ({args.workers} workers, model {service.model_id[:12]})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = False
+_tracing = False
+_local = threading.local()
+_trace_lock = threading.Lock()
+
+# -------------------- Metric Types --------------------
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, stage, amount=1):
+        with self._lock:
+            key = (name, stage)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            if self._histograms:
+                lines.append("# HELP app_stage_duration_seconds Time spent in each request stage.")
+                lines.append("# TYPE app_stage_duration_seconds histogram")
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'app_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'app_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'app_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'app_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, stage), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f'{name}{{stage="{stage}"}} {value}')
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        with self._lock:
+            return {
+                stage: {"count": histogram.count, "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else 0.0}
+                for stage, histogram in sorted(self._histograms.items())
+            }
+
+registry = Registry()
+
+def configure(enabled=True, tracing=False):
+    global _enabled, _tracing
+    _enabled = bool(enabled)
+    _tracing = bool(enabled and tracing)
+
+def is_enabled():
+    return _enabled
+
+# -------------------- Instrumentation --------------------
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        registry.observe(self.stage, elapsed)
+        registry.inc("app_stage_calls_total", self.stage)
+        if exc_type is not None:
+            registry.inc("app_stage_errors_total", self.stage)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append({"stage": self.stage, "offset_ms": (self.start - _local.started) * 1000, "duration_ms": elapsed * 1000, "error": exc_type is not None})
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timed(stage):
+    # Works both as `with timed("stage"):` and as `@timed("stage")`. When
+    # metrics are disabled the cost is one global lookup per call.
+    return _StageTimer(stage)
+
+class _StageTimer:
+    __slots__ = ("stage", "_active")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self._active = _Timer(self.stage) if _enabled else _NULL_TIMER
+        return self._active.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._active.__exit__(exc_type, exc, tb)
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+# -------------------- Traces --------------------
+class trace:
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path
+
+    def __enter__(self):
+        if _tracing:
+            _local.spans = []
+            _local.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        spans = getattr(_local, "spans", None)
+        if spans is None:
+            return False
+        _local.spans = None
+        record = {
+            "trace": self.name,
+            "timestamp": time.time(),
+            "duration_ms": (time.perf_counter() - _local.started) * 1000,
+            "spans": spans,
+        }
+        if self.path and spans:
+            with _trace_lock, open(self.path, "a") as trace_file:
+                trace_file.write(json.dumps(record) + "\n")
+        return False
+
+# -------------------- Process Memory --------------------
+def max_rss_bytes():
+    # Process-lifetime peak RSS. ru_maxrss is in kilobytes on Linux but in
+    # bytes on macOS; None where the resource module does not exist.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def current_rss_bytes():
+    # Resident set size right now; only available on Linux.
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# -------------------- Export --------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def write_textfile(path):
+    # A unique temp file per write, so concurrent writers never share one.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as metrics_file:
+            metrics_file.write(registry.render_prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def start_textfile_writer(path, interval=15.0):
+    # Rewrites the textfile from one background thread instead of at the end
+    # of every page render.
+    stopped = threading.Event()
+    def run():
+        while not stopped.wait(interval):
+            try:
+                write_textfile(path)
+            except OSError:
+                pass
+    threading.Thread(target=run, name="metrics-textfile", daemon=True).start()
+    return stopped
@@ -0,0 +1,53 @@
+import argparse
+import base64
+import os
+import sys
+
+from blob_store import open_blob_store
+from data_access import DATABASE_NAME, create_client
+
+def migrate(applications, blob_store, batch_size=100, keep_inline=False, limit=None):
+    from pymongo import UpdateOne
+    query = {"image_base64": {"$exists": True, "$nin": [None, ""]}, "image_ref": {"$exists": False}}
+    cursor = applications.find(query, {"image_base64": 1}).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+    migrated = failed = 0
+    updates = []
+    for application in cursor:
+        try:
+            key = blob_store.put(base64.b64decode(application["image_base64"]))
+        except Exception as e:
+            print(f"Skipping {application['_id']}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        change = {"$set": {"image_ref": key}}
+        if not keep_inline:
+            change["$unset"] = {"image_base64": ""}
+        updates.append(UpdateOne({"_id": application["_id"]}, change))
+        if len(updates) >= batch_size:
+            migrated += applications.bulk_write(updates, ordered=False).modified_count
+            updates = []
+            print(f"Migrated {migrated} applications...", file=sys.stderr)
+    if updates:
+        migrated += applications.bulk_write(updates, ordered=False).modified_count
+    return migrated, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move inline image_base64 scans into the content-addressed blob store.")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"))
+    parser.add_argument("--blob-dir", default=os.environ.get("BLOB_STORE_DIR"), help="Local blob directory (default: GridFS)")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--keep-inline", action="store_true", help="Keep image_base64 after copying it")
+    args = parser.parse_args(argv)
+    if not args.mongo_url:
+        parser.error("MongoDB URL not found. Pass --mongo-url or set MONGO_URL.")
+
+    db = create_client(args.mongo_url)[DATABASE_NAME]
+    migrated, failed = migrate(db["applications"], open_blob_store(db, args.blob_dir), args.batch_size, args.keep_inline, args.limit)
+    print(f"Migrated {migrated} applications ({failed} failed).", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
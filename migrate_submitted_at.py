@@ -0,0 +1,22 @@
+import argparse
+import os
+import sys
+
+from data_access import DATABASE_NAME, create_client
+from scan_history import normalize_submitted_at
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert legacy \"%%d-%%m-%%Y %%H:%%M:%%S\" submitted_at strings to datetimes.")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"))
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+    if not args.mongo_url:
+        parser.error("MongoDB URL not found. Pass --mongo-url or set MONGO_URL.")
+
+    db = create_client(args.mongo_url)[DATABASE_NAME]
+    converted, failed = normalize_submitted_at(db["applications"], args.batch_size)
+    print(f"Converted {converted} applications ({failed} unparseable).", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
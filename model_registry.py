@@ -0,0 +1,210 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from prediction_cache import model_fingerprint
+from startup import ModelWarmup
+
+def spec_version(spec):
+    return spec.get("version") or os.path.splitext(os.path.basename(spec["path"]))[0]
+
+class Deployment:
+    def __init__(self, spec, warmup):
+        self.spec = spec
+        self.version = spec_version(spec)
+        self.model_id = model_fingerprint(spec["path"])
+        self.warmup = warmup
+
+    def engine(self, timeout=None):
+        return self.warmup.engine(timeout)
+
+    def describe(self):
+        return {"version": self.version, "backend": self.spec.get("backend", "keras"), "ready": self.warmup.is_ready()}
+
+class ShadowStats:
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.agreements = 0
+        self.errors = 0
+        self.dropped = 0
+        self.live_latencies = deque(maxlen=window)
+        self.shadow_latencies = deque(maxlen=window)
+
+    def record(self, agreed, live_ms, shadow_ms):
+        with self._lock:
+            self.samples += 1
+            self.agreements += int(agreed)
+            self.live_latencies.append(live_ms)
+            self.shadow_latencies.append(shadow_ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_dropped(self):
+        with self._lock:
+            self.dropped += 1
+
+    def summary(self):
+        with self._lock:
+            live = np.array(self.live_latencies) if self.live_latencies else np.zeros(1)
+            shadow = np.array(self.shadow_latencies) if self.shadow_latencies else np.zeros(1)
+            return {
+                "samples": self.samples,
+                "agreement": self.agreements / self.samples if self.samples else None,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "live_p50_ms": float(np.percentile(live, 50)),
+                "shadow_p50_ms": float(np.percentile(shadow, 50)),
+                "live_p99_ms": float(np.percentile(live, 99)),
+                "shadow_p99_ms": float(np.percentile(shadow, 99)),
+            }
+
+class ModelRegistry:
+    # Serves predictions from the live deployment. A new live version is
+    # loaded and warmed in the background and swapped in with one reference
+    # assignment; an optional shadow version sees a sampled fraction of
+    # traffic off the request path.
+    def __init__(self, model_loader, engine_factory, default_spec, registry_path=None, timer=None,
+                 poll_interval=5.0, retire_after=30.0, max_shadow_pending=8):
+        self.model_loader = model_loader
+        self.engine_factory = engine_factory
+        self.default_spec = default_spec
+        self.registry_path = registry_path
+        self.timer = timer
+        self.retire_after = retire_after
+        self._live = None
+        self._pending = None
+        self._shadow = None
+        self.shadow_fraction = 0.0
+        self.shadow_stats = ShadowStats()
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_slots = threading.BoundedSemaphore(max_shadow_pending)
+        self._lock = threading.Lock()
+        self._config_mtime = None
+        self.swaps = 0
+        self.apply(self._read_config())
+        if registry_path:
+            threading.Thread(target=self._watch, args=(poll_interval,), name="model-registry", daemon=True).start()
+
+    # -------------------- Configuration --------------------
+    def _read_config(self):
+        if not self.registry_path or not os.path.exists(self.registry_path):
+            return {"live": self.default_spec}
+        self._config_mtime = os.path.getmtime(self.registry_path)
+        with open(self.registry_path, "r") as registry_file:
+            return json.load(registry_file)
+
+    def _watch(self, poll_interval):
+        while True:
+            time.sleep(poll_interval)
+            try:
+                if os.path.exists(self.registry_path) and os.path.getmtime(self.registry_path) != self._config_mtime:
+                    self.apply(self._read_config())
+            except (OSError, ValueError):
+                continue
+
+    def _deploy(self, spec):
+        return Deployment(spec, ModelWarmup(lambda: self.model_loader(spec), self.engine_factory, timer=self.timer))
+
+    def apply(self, config):
+        live_spec = config.get("live") or self.default_spec
+        shadow_spec = config.get("shadow")
+        with self._lock:
+            if self._live is None:
+                self._live = self._deploy(live_spec)
+            elif live_spec == self._live.spec:
+                if self._pending is not None:
+                    self._retire(self._pending)
+                    self._pending = None
+            elif self._pending is None or live_spec != self._pending.spec:
+                if self._pending is not None:
+                    self._retire(self._pending)
+                self._pending = self._deploy(live_spec)
+                threading.Thread(target=self._promote, args=(self._pending,), name="model-promote", daemon=True).start()
+            if shadow_spec is None:
+                if self._shadow is not None:
+                    self._retire(self._shadow)
+                self._shadow = None
+            elif self._shadow is None or shadow_spec != self._shadow.spec:
+                if self._shadow is not None:
+                    self._retire(self._shadow)
+                self._shadow = self._deploy(shadow_spec)
+                self.shadow_stats = ShadowStats()
+            self.shadow_fraction = float(config.get("shadow_fraction", 0.0))
+
+    def _promote(self, deployment):
+        try:
+            deployment.engine()
+        except Exception:
+            with self._lock:
+                if self._pending is deployment:
+                    self._pending = None
+            return
+        with self._lock:
+            if self._pending is not deployment:
+                return
+            retired, self._live, self._pending = self._live, deployment, None
+            self.swaps += 1
+        self._retire(retired)
+
+    def _retire(self, deployment):
+        # Stops a replaced deployment's engine once its warm-up has finished
+        # and requests that already picked it up have had time to complete.
+        def stop():
+            try:
+                engine = deployment.engine()
+            except Exception:
+                return
+            time.sleep(self.retire_after)
+            engine.stop()
+        threading.Thread(target=stop, name="model-retire", daemon=True).start()
+
+    # -------------------- Serving --------------------
+    def live(self):
+        return self._live
+
+    def is_ready(self):
+        return self._live.warmup.is_ready()
+
+    def predict(self, img_array):
+        deployment = self._live
+        start = time.perf_counter()
+        predictions = deployment.engine().predict(img_array)
+        live_ms = (time.perf_counter() - start) * 1000
+        shadow = self._shadow
+        if shadow is not None and shadow.warmup.is_ready() and random.random() < self.shadow_fraction:
+            if self._shadow_slots.acquire(blocking=False):
+                future = self._shadow_pool.submit(self._run_shadow, shadow, img_array, predictions, live_ms)
+                future.add_done_callback(lambda _: self._shadow_slots.release())
+            else:
+                self.shadow_stats.record_dropped()
+        return predictions, deployment
+
+    def _run_shadow(self, shadow, img_array, live_predictions, live_ms):
+        try:
+            start = time.perf_counter()
+            shadow_predictions = shadow.engine().predict(img_array)
+            shadow_ms = (time.perf_counter() - start) * 1000
+        except Exception:
+            self.shadow_stats.record_error()
+            return
+        agreed = bool(np.array_equal(np.argmax(live_predictions, axis=-1), np.argmax(shadow_predictions, axis=-1)))
+        self.shadow_stats.record(agreed, live_ms, shadow_ms)
+
+    def stats(self):
+        with self._lock:
+            live, pending, shadow = self._live, self._pending, self._shadow
+        return {
+            "live": live.describe(),
+            "pending": pending.describe() if pending else None,
+            "shadow": dict(shadow.describe(), fraction=self.shadow_fraction, **self.shadow_stats.summary()) if shadow else None,
+            "swaps": self.swaps,
+        }
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_fingerprint(model_path):
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return hash_bytes(os.path.abspath(model_path).encode())
+    identity = f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hash_bytes(identity.encode())
+
+
+class PredictionCache:
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_entries=10000):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._disk_entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _scan_disk(self):
+        # Rebuild the disk LRU from file mtimes so the cap holds across restarts.
+        found = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    try:
+                        found.append((os.path.getmtime(os.path.join(root, name)), name[:-len(".json")]))
+                    except OSError:
+                        pass
+        for _, key in sorted(found):
+            self._disk_entries[key] = None
+        self._shrink_disk()
+
+    def _shrink_disk(self):
+        while len(self._disk_entries) > self.max_disk_entries:
+            key, _ = self._disk_entries.popitem(last=False)
+            self.disk_evictions += 1
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def make_key(self, image_bytes, model_id):
+        return hash_bytes(model_id.encode() + b":" + hash_bytes(image_bytes).encode())
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            if key in self._disk_entries:
+                self._disk_entries.move_to_end(key)
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w") as cache_file:
+                json.dump(value, cache_file)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._disk_entries[key] = None
+            self._disk_entries.move_to_end(key)
+            self._shrink_disk()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.disk_dir),
+                "disk_entries": len(self._disk_entries),
+                "max_disk_entries": self.max_disk_entries,
+                "disk_evictions": self.disk_evictions,
+            }
@@ -0,0 +1,57 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from inference import IMG_SIZE, preprocess_input
+from metrics import timed
+
+@timed("image_open")
+def decode_into(image, out, draft=True):
+    # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale (never
+    # below IMG_SIZE), so large scans are not decoded at full resolution only
+    # to be shrunk. It is a no-op for PNGs and already-loaded images.
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(BytesIO(image))
+    if draft and image.size != IMG_SIZE:
+        image.draft("RGB", IMG_SIZE)
+    image = image.convert('RGB')
+    if image.size != IMG_SIZE:
+        image = image.resize(IMG_SIZE)
+    out[...] = np.asarray(image)
+    return out
+
+def load_image_array(image, draft=True):
+    return decode_into(image, np.empty((*IMG_SIZE, 3), dtype=np.uint8), draft)
+
+def to_model_input(pixels, out=None):
+    # One vectorized uint8 -> float32 conversion and preprocess_input call
+    # for the whole batch.
+    if out is None:
+        out = np.empty(pixels.shape, dtype=np.float32)
+    np.copyto(out, pixels, casting='unsafe')
+    return preprocess_input(out)
+
+def preprocess_image(image, draft=True):
+    return to_model_input(load_image_array(image, draft)[np.newaxis, ...])
+
+class BatchBuffer:
+    def __init__(self, max_batch_size=32):
+        self.max_batch_size = max_batch_size
+        self.pixels = np.empty((max_batch_size, *IMG_SIZE, 3), dtype=np.uint8)
+        self.inputs = np.empty((max_batch_size, *IMG_SIZE, 3), dtype=np.float32)
+
+    def slot(self, index):
+        return self.pixels[index]
+
+    def model_input(self, count):
+        # Returns a view into the shared buffer; it is overwritten by the
+        # next batch, so consume it before refilling.
+        return to_model_input(self.pixels[:count], self.inputs[:count])
+
+    def preprocess(self, images, draft=True):
+        if len(images) > self.max_batch_size:
+            raise ValueError(f"Batch of {len(images)} exceeds buffer size {self.max_batch_size}.")
+        for index, image in enumerate(images):
+            decode_into(image, self.pixels[index], draft)
+        return self.model_input(len(images))
@@ -0,0 +1,185 @@
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from metrics import timed
+
+REPORT_TEMPLATE = "v1"
+
+# -------------------- Rendering --------------------
+@timed("generate_pdf")
+def generate_pdf(name, age, place, phone_number, image, diagnosis, confidence, formatted_datetime):
+    # `image` is the raw JPEG/PNG bytes of the scan (or None); the PDF is
+    # returned as bytes, nothing touches the disk.
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(200, 10, "Alzheimer's MRI Scan Report", ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font("Arial", "I", 10)
+    pdf.cell(0, 10, f"Report Generated: {formatted_datetime}", ln=True)
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "Patient Details:", ln=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 10, f"Name: {name}", ln=True)
+    pdf.cell(0, 10, f"Age: {age}", ln=True)
+    pdf.cell(0, 10, f"Place: {place}", ln=True)
+    pdf.cell(0, 10, f"Phone Number: {phone_number}", ln=True)
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "Diagnosis Result:", ln=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 10, f"Prediction: {diagnosis}", ln=True)
+    pdf.cell(0, 10, f"Confidence: {confidence:.2f}%", ln=True)
+    pdf.ln(10)
+    if image:
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(200, 10, "MRI Scan:", ln=True)
+        pdf.image(BytesIO(image), x=60, w=100)
+        pdf.ln(10)
+    pdf.set_font("Arial", "I", 10)
+    pdf.cell(200, 10, "This report is generated by the Alzheimer's MRI Analysis System.", ln=True, align="C")
+    return bytes(pdf.output())
+
+def render_report(report):
+    return generate_pdf(
+        report["name"], report["age"], report["place"], report["phone_number"], report.get("image"),
+        report["prediction"], report["confidence"], report["submitted_at"],
+    )
+
+# -------------------- Background Rendering --------------------
+class ReportQueueFull(Exception):
+    pass
+
+class ReportService:
+    def __init__(self, max_workers=2, max_pending=32, cache_size=128, template=REPORT_TEMPLATE,
+                 max_bulk_jobs=4, bulk_dir=None):
+        self.template = template
+        self.cache_size = cache_size
+        self.max_workers = max_workers
+        self.max_bulk_jobs = max_bulk_jobs
+        self.bulk_dir = bulk_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        # Bulk jobs only walk history and write the zip; their PDFs are
+        # rendered on the shared report pool above.
+        self._bulk_executor = ThreadPoolExecutor(max_workers=max_bulk_jobs, thread_name_prefix="report-bulk")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = OrderedDict()
+        self._bulk_jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def job_key(self, application_id):
+        return f"{application_id}:{self.template}"
+
+    def submit(self, application_id, report):
+        key = self.job_key(application_id)
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None and not (future.done() and future.exception()):
+                self._jobs.move_to_end(key)
+                return key
+            if not self._slots.acquire(blocking=False):
+                raise ReportQueueFull("Too many reports are being generated. Please try again shortly.")
+            future = self._executor.submit(render_report, report)
+            future.add_done_callback(lambda _: self._slots.release())
+            self._jobs[key] = future
+            while len(self._jobs) > self.cache_size:
+                oldest_key, oldest = next(iter(self._jobs.items()))
+                if not oldest.done():
+                    break
+                del self._jobs[oldest_key]
+        return key
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    # -------------------- Bulk Export --------------------
+    def _render_queued(self, report):
+        # Waits for a pending slot instead of failing, so a bulk export shares
+        # the bounded pool with single reports rather than flooding it.
+        self._slots.acquire()
+        future = self._executor.submit(render_report, report)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _write_bulk(self, reports):
+        fd, path = tempfile.mkstemp(prefix="reports-", suffix=".zip", dir=self.bulk_dir)
+        try:
+            with os.fdopen(fd, "wb") as archive_file:
+                count = write_reports_zip(reports, archive_file, self._render_queued, self.max_workers * 2)
+        except BaseException:
+            _remove_file(path)
+            raise
+        return path, count
+
+    def submit_bulk(self, owner, reports):
+        # `reports` yields (filename, report) pairs and is consumed on a bulk
+        # worker. The job's future resolves to (zip_path, count).
+        with self._lock:
+            future = self._bulk_jobs.pop(owner, None)
+            if future is not None and not future.done():
+                self._bulk_jobs[owner] = future
+                return owner
+            _discard_bulk(future)
+            if sum(not job.done() for job in self._bulk_jobs.values()) >= self.max_bulk_jobs:
+                raise ReportQueueFull("Too many report archives are being generated. Please try again shortly.")
+            self._bulk_jobs[owner] = self._bulk_executor.submit(self._write_bulk, reports)
+            while len(self._bulk_jobs) > self.max_bulk_jobs:
+                oldest_owner, oldest = next(iter(self._bulk_jobs.items()))
+                if not oldest.done():
+                    break
+                del self._bulk_jobs[oldest_owner]
+                _discard_bulk(oldest)
+        return owner
+
+    def get_bulk(self, owner):
+        with self._lock:
+            return self._bulk_jobs.get(owner)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(not future.done() for future in self._jobs.values())
+            pending_bulk = sum(not future.done() for future in self._bulk_jobs.values())
+            return {
+                "cached_reports": len(self._jobs) - pending,
+                "pending_reports": pending,
+                "bulk_archives": len(self._bulk_jobs) - pending_bulk,
+                "pending_bulk_archives": pending_bulk,
+            }
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _discard_bulk(future):
+    if future is not None and future.done() and future.exception() is None:
+        _remove_file(future.result()[0])
+
+def write_reports_zip(reports, fileobj, submit, max_in_flight=4):
+    # `reports` yields (filename, report) pairs and `submit(report)` returns a
+    # Future of the PDF bytes. At most `max_in_flight` renders are
+    # outstanding and the archive streams to `fileobj`, so memory stays
+    # bounded for any history size.
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        pending = deque()
+        count = 0
+        for filename, report in reports:
+            pending.append((filename, submit(report)))
+            if len(pending) >= max_in_flight:
+                filename, future = pending.popleft()
+                archive.writestr(filename, future.result())
+                count += 1
+        for filename, future in pending:
+            archive.writestr(filename, future.result())
+            count += 1
+    return count
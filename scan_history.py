@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytz
+
+HISTORY_INDEX = [("user_email", 1), ("submitted_at", -1), ("_id", -1)]
+HISTORY_SORT = [("submitted_at", -1), ("_id", -1)]
+EXPORT_INDEX = [("submitted_at", 1), ("_id", 1)]
+LIST_PROJECTION = {"image_base64": 0}
+LEGACY_DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
+LOCAL_TIMEZONE = pytz.timezone("Asia/Kolkata")
+
+def ensure_indexes(collection):
+    collection.create_index(HISTORY_INDEX, name="user_email_submitted_at")
+    collection.create_index(EXPORT_INDEX, name="submitted_at")
+
+def as_datetime(value):
+    # Older applications stored submitted_at as an Asia/Kolkata local time
+    # string; new ones store a real (UTC) datetime.
+    if isinstance(value, str):
+        return LOCAL_TIMEZONE.localize(datetime.strptime(value, LEGACY_DATE_FORMAT)).astimezone(timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def normalize_submitted_at(collection, batch_size=500):
+    from pymongo import UpdateOne
+    cursor = collection.find({"submitted_at": {"$type": "string"}}, {"submitted_at": 1}).batch_size(batch_size)
+    converted = failed = 0
+    updates = []
+    for application in cursor:
+        try:
+            submitted_at = as_datetime(application["submitted_at"])
+        except ValueError:
+            failed += 1
+            continue
+        updates.append(UpdateOne({"_id": application["_id"]}, {"$set": {"submitted_at": submitted_at}}))
+        if len(updates) >= batch_size:
+            converted += collection.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        converted += collection.bulk_write(updates, ordered=False).modified_count
+    return converted, failed
+
+def get_previous_applications(collection, email):
+    applications = collection.find({"user_email": email}).sort("submitted_at", -1)
+    return list(applications)
+
+def list_applications_page(collection, email, page_size=10, after=None):
+    # Keyset pagination: `after` is the (submitted_at, _id) of the last row of
+    # the previous page, so each page is one bounded index range scan.
+    query = {"user_email": email}
+    if after is not None:
+        submitted_at, last_id = after
+        query["$or"] = [
+            {"submitted_at": {"$lt": submitted_at}},
+            {"submitted_at": submitted_at, "_id": {"$lt": last_id}},
+        ]
+        # MongoDB only compares values of the same BSON type, but the sort
+        # puts every non-date (legacy string, missing) after the dates. Until
+        # migrate_submitted_at.py has run, a date cursor must fall through to
+        # them, and a string cursor to missing values.
+        if isinstance(submitted_at, datetime):
+            query["$or"].append({"submitted_at": {"$not": {"$type": "date"}}})
+        elif isinstance(submitted_at, str):
+            query["$or"].append({"submitted_at": None})
+    cursor = collection.find(query, LIST_PROJECTION).sort(HISTORY_SORT).limit(page_size + 1)
+    applications = list(cursor)
+    next_cursor = None
+    if len(applications) > page_size:
+        applications = applications[:page_size]
+        last = applications[-1]
+        next_cursor = (last.get("submitted_at"), last["_id"])
+    return applications, next_cursor
+
+def fetch_application_image(collection, application_id, email):
+    application = collection.find_one({"_id": application_id, "user_email": email}, {"_id": 0, "image_ref": 1, "image_base64": 1})
+    return application or {}
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+class SessionImageStore:
+    # Holds the original (compressed) upload bytes once per content hash,
+    # shared by every session on this server. Sessions keep only the key.
+    def __init__(self, max_bytes=64 * 1024 * 1024, idle_timeout=30 * 60):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self._images = OrderedDict()
+        self._sessions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, session_id, data):
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._release(session_id)
+            if key in self._images:
+                self._images.move_to_end(key)
+            else:
+                self._images[key] = data
+                self._bytes += len(data)
+            self._sessions[session_id] = (key, time.monotonic())
+            self._shrink()
+        return key
+
+    def get(self, key):
+        with self._lock:
+            data = self._images.get(key)
+            if data is not None:
+                self._images.move_to_end(key)
+            return data
+
+    def touch(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions[session_id] = (entry[0], time.monotonic())
+
+    def release(self, session_id):
+        with self._lock:
+            self._release(session_id)
+
+    def _release(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return
+        key = entry[0]
+        if key in self._images and not any(other == key for other, _ in self._sessions.values()):
+            self._bytes -= len(self._images.pop(key))
+
+    def _shrink(self):
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, data = self._images.popitem(last=False)
+            self._bytes -= len(data)
+            self.evictions += 1
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [session_id for session_id, (_, seen) in self._sessions.items() if seen < cutoff]
+            for session_id in idle:
+                self._release(session_id)
+        return len(idle)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "images": len(self._images),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "sessions": len(self._sessions),
+                "evictions": self.evictions,
+            }
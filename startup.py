@@ -0,0 +1,64 @@
+import threading
+import time
+
+import numpy as np
+
+from inference import IMG_SIZE
+
+STARTUP_T0 = time.perf_counter()
+
+class StartupTimer:
+    def __init__(self, t0=STARTUP_T0):
+        self.t0 = t0
+        self._marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            if name not in self._marks:
+                self._marks[name] = (time.perf_counter() - self.t0) * 1000
+
+    def report(self):
+        with self._lock:
+            return {f"{name}_ms": round(elapsed, 1) for name, elapsed in self._marks.items()}
+
+class ModelWarmup:
+    def __init__(self, model_loader, engine_factory, timer=None):
+        self.model_loader = model_loader
+        self.engine_factory = engine_factory
+        self.timer = timer or StartupTimer()
+        self._model = None
+        self._engine = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._model = self.model_loader()
+            self.timer.mark("model_loaded")
+            self._engine = self.engine_factory(self._model)
+            self._engine.predict(np.zeros((1, *IMG_SIZE, 3), dtype=np.float32))
+            self.timer.mark("model_warm")
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def is_ready(self):
+        return self._ready.is_set() and self._error is None
+
+    def _wait(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Model warm-up did not finish in time.")
+        if self._error is not None:
+            raise RuntimeError(f"Model failed to load: {self._error}") from self._error
+
+    def model(self, timeout=None):
+        self._wait(timeout)
+        return self._model
+
+    def engine(self, timeout=None):
+        self._wait(timeout)
+        return self._engine
@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("bson")
+
+from data_access import WriteBehindQueue
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["AlzheimersDiseaseDetectionTest"]["applications"]
+
+def make_application(i):
+    return {"user_email": f"user{i}@example.com", "prediction": "Final CN JPEG", "confidence": 90.0}
+
+def test_batched_inserts_resolve_to_ids(collection):
+    writes = WriteBehindQueue(collection, max_batch_size=10, flush_interval=0.01)
+    futures = [writes.submit(make_application(i)) for i in range(25)]
+    ids = [future.result(timeout=5) for future in futures]
+    writes.stop()
+    assert collection.count_documents({}) == 25
+    assert set(ids) == {document["_id"] for document in collection.find({}, {"_id": 1})}
+    assert writes.stats()["written"] == 25
+
+def test_failed_write_only_fails_its_own_future(collection):
+    writes = WriteBehindQueue(collection, max_batch_size=10, flush_interval=0.05)
+    first = writes.submit(make_application(0))
+    first.result(timeout=5)
+    duplicate = writes.submit(dict(make_application(1), _id=first.result()))
+    other = writes.submit(make_application(2))
+    with pytest.raises(RuntimeError):
+        duplicate.result(timeout=5)
+    assert other.result(timeout=5) is not None
+    writes.stop()
+    assert collection.count_documents({}) == 2
+    assert writes.stats()["failed"] == 1
+
+def test_full_queue_writes_on_caller_thread(collection):
+    blocked = threading.Event()
+    original_insert_many = collection.insert_many
+    def slow_insert_many(documents, **kwargs):
+        blocked.wait(5)
+        return original_insert_many(documents, **kwargs)
+    collection.insert_many = slow_insert_many
+    writes = WriteBehindQueue(collection, max_batch_size=1, flush_interval=0, max_queue=1)
+    futures = [writes.submit(make_application(i)) for i in range(5)]
+    assert writes.stats()["sync_fallbacks"] >= 1
+    blocked.set()
+    assert all(future.result(timeout=5) is not None for future in futures)
+    writes.stop()
+    assert collection.count_documents({}) == 5
+
+def test_stop_drains_queued_writes(collection):
+    writes = WriteBehindQueue(collection, max_batch_size=100, flush_interval=1.0)
+    futures = [writes.submit(make_application(i)) for i in range(50)]
+    assert writes.stop(timeout=5)
+    assert all(future.done() for future in futures)
+    assert collection.count_documents({}) == 50
+    late = writes.submit(make_application(50))
+    assert late.result(timeout=1) is not None
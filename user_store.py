@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+DUPLICATE_KEY_ERROR = 11000
+
+def load_all_users(collection):
+    users = collection.find()
+    return {user["email"]: {"name": user["name"], "password": user["password"]} for user in users}
+
+def find_duplicate_emails(collection):
+    # The old check-then-insert signup could race and store an email twice.
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$email", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return {group["_id"]: group["ids"] for group in collection.aggregate(pipeline, allowDiskUse=True)}
+
+def remove_duplicate_users(collection, dry_run=False):
+    # Keeps the earliest account for each email (the one login has always
+    # matched) and deletes the later copies.
+    removed = 0
+    for email, ids in find_duplicate_emails(collection).items():
+        extra = ids[1:]
+        if not dry_run:
+            collection.delete_many({"_id": {"$in": extra}})
+        removed += len(extra)
+    return removed
+
+class UserStore:
+    def __init__(self, collection, cache_ttl=10.0, cache_size=4096):
+        self.collection = collection
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        from pymongo.errors import OperationFailure
+        try:
+            self.collection.create_index("email", unique=True, name="email_unique")
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY_ERROR:
+                raise
+            # Existing duplicate emails block the unique index. Keep serving;
+            # python dedupe_users.py removes them so the index can be built.
+            logger.warning("Unique email index not created, duplicate users exist: %s", e)
+            return False
+        return True
+
+    def _cached(self, email):
+        with self._lock:
+            entry = self._cache.get(email)
+            if entry is None:
+                return _MISSING
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._cache[email]
+                return _MISSING
+            self._cache.move_to_end(email)
+            return user
+
+    def _remember(self, email, user):
+        if self.cache_ttl <= 0:
+            return
+        with self._lock:
+            self._cache[email] = (user, time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(email)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, email):
+        with self._lock:
+            self._cache.pop(email, None)
+
+    def find_user(self, email):
+        user = self._cached(email)
+        if user is not _MISSING:
+            return user
+        user = self.collection.find_one({"email": email}, {"_id": 0, "name": 1, "password": 1})
+        self._remember(email, user)
+        return user
+
+    def create_user(self, email, name, password):
+        from pymongo.errors import DuplicateKeyError
+        # Upsert with $setOnInsert on the unique email index, so two concurrent
+        # signups for the same address cannot both succeed.
+        try:
+            result = self.collection.update_one(
+                {"email": email},
+                {"$setOnInsert": {"email": email, "name": name, "password": password}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            created = False
+        else:
+            created = result.upserted_id is not None
+        self.invalidate(email)
+        return created